@@ -1,19 +1,50 @@
 """The Smartbox integration."""
 
-from dataclasses import dataclass
+import asyncio
+from collections import defaultdict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from functools import partial
 import logging
+import time
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from smartbox import AsyncSmartboxSession
 from smartbox.error import APIUnavailableError, InvalidAuthError, SmartboxError
 
-from .const import CONF_API_NAME
-from .models import SmartboxDevice, SmartboxNode, get_devices
+from .const import (
+    CONF_API_NAME,
+    DEVICE_RETRY_INTERVAL,
+    DEVICE_RETRY_MAX_INTERVAL,
+    DEVICE_TEARDOWN_TIMEOUT,
+    DOMAIN,
+    HEALTH_CHECK_TTL,
+    HOT_APPLIED_OPTIONS,
+    RUNTIME_CACHE_GRACE_PERIOD,
+    SMARTBOX_RUNTIME_CACHE,
+    SMARTBOX_SESSION_FACTORY,
+    SMARTBOX_TEARDOWN,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_STORAGE_VERSION,
+    VALIDATED_SESSION_TTL,
+)
+from .models import (
+    Device,
+    SmartboxDevice,
+    SmartboxNode,
+    get_devices,
+    get_session_devices,
+    initialise_devices,
+)
 
 __version__ = "2.3.0"
 
@@ -37,11 +68,130 @@ class SmartboxData:
     client: AsyncSmartboxSession
     devices: list[SmartboxDevice]
     nodes: list[SmartboxNode]
+    store: Store[dict[str, Any]]
+    # options the entry runs with, to tell which ones changed
+    options: dict[str, Any] = field(default_factory=dict)
+    # whether every device of the account is set up
+    discovered: bool = False
+
+    def as_snapshot(self) -> dict[str, Any]:
+        """Return the snapshot used to warm start the entry."""
+        return {"devices": [device.as_snapshot() for device in self.devices]}
+
+
+@dataclass
+class CachedRuntimeData:
+    """Runtime data of an unloaded entry, kept for a reload."""
+
+    data: SmartboxData
+    entry_data: dict[str, Any]
+    cancel_expiry: CALLBACK_TYPE
+
+
+class SessionFactory:
+    """Create the sessions of the entries.
+
+    Every setup gets its own session. The API of a reseller is health checked
+    at most once every HEALTH_CHECK_TTL seconds, whichever entry creates a
+    session for it. A session validated by the config flow is used by the
+    first setup of its account within VALIDATED_SESSION_TTL seconds, instead
+    of logging in again.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialise the session factory."""
+        self._hass = hass
+        # expiry time of the last successful health check of each reseller
+        self._healthy_resellers: dict[str, float] = {}
+        # validated sessions with their password and expiry time
+        self._validated: dict[
+            tuple[str, str], tuple[AsyncSmartboxSession, str, float]
+        ] = {}
+        self._health_check_locks: defaultdict[str, asyncio.Lock] = defaultdict(
+            asyncio.Lock
+        )
+
+    async def async_get_session(
+        self, data: Mapping[str, Any], *, validate: bool = True
+    ) -> AsyncSmartboxSession:
+        """Return a session for an account, checking its login if validate."""
+        key = (data[CONF_API_NAME], data[CONF_USERNAME])
+        if (session := self._pop_validated(key, data[CONF_PASSWORD])) is not None:
+            return session
+        session = await create_smartbox_session_from_entry(
+            self._hass, dict(data), validate=False
+        )
+        if validate:
+            await self.async_health_check(data[CONF_API_NAME], session)
+            await session.check_refresh_auth()
+        return session
+
+    @callback
+    def add_validated(
+        self, data: Mapping[str, Any], session: AsyncSmartboxSession
+    ) -> None:
+        """Keep a session the config flow validated for the first setup."""
+        now = time.monotonic()
+        self._validated = {
+            key: validated
+            for key, validated in self._validated.items()
+            if validated[2] > now
+        }
+        self._validated[(data[CONF_API_NAME], data[CONF_USERNAME])] = (
+            session,
+            data[CONF_PASSWORD],
+            now + VALIDATED_SESSION_TTL,
+        )
+        self._healthy_resellers[data[CONF_API_NAME]] = now + HEALTH_CHECK_TTL
+
+    def _pop_validated(
+        self, key: tuple[str, str], password: str
+    ) -> AsyncSmartboxSession | None:
+        """Return the unexpired validated session of an account, if any."""
+        if (validated := self._validated.pop(key, None)) is None:
+            return None
+        session, validated_password, expires = validated
+        if validated_password != password or expires <= time.monotonic():
+            return None
+        return session
+
+    async def async_health_check(
+        self, api_name: str, session: AsyncSmartboxSession
+    ) -> None:
+        """Check the health of the API of a reseller, unless it recently passed."""
+        async with self._health_check_locks[api_name]:
+            if self._healthy_resellers.get(api_name, 0) <= time.monotonic():
+                await session.health_check()
+                self._healthy_resellers[api_name] = time.monotonic() + HEALTH_CHECK_TTL
+
+
+def _session_factory(hass: HomeAssistant) -> SessionFactory:
+    """Return the session factory of the integration."""
+    if SMARTBOX_SESSION_FACTORY not in hass.data:
+        hass.data[SMARTBOX_SESSION_FACTORY] = SessionFactory(hass)
+    return hass.data[SMARTBOX_SESSION_FACTORY]
+
+
+@callback
+def async_hand_over_session(
+    hass: HomeAssistant, data: Mapping[str, Any], session: AsyncSmartboxSession
+) -> None:
+    """Hand a session validated by the config flow over to the entry setup."""
+    _session_factory(hass).add_validated(data, session)
+
+
+def _snapshot_store(
+    hass: HomeAssistant, entry: SmartboxConfigEntry
+) -> Store[dict[str, Any]]:
+    """Return the store holding the snapshot of an entry."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
 
 
 async def create_smartbox_session_from_entry(
     hass: HomeAssistant,
     entry: SmartboxConfigEntry | dict[str, Any] | None = None,
+    *,
+    validate: bool = True,
 ) -> AsyncSmartboxSession:
     """Create a Session class from smartbox."""
     data = {}
@@ -57,8 +207,9 @@ async def create_smartbox_session_from_entry(
             password=data[CONF_PASSWORD],
             websession=websession,
         )
-        await session.health_check()
-        await session.check_refresh_auth()
+        if validate:
+            await session.health_check()
+            await session.check_refresh_auth()
     except APIUnavailableError as ex:
         raise APIUnavailableError(ex) from ex
     except InvalidAuthError as ex:
@@ -70,22 +221,89 @@ async def create_smartbox_session_from_entry(
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) -> bool:
-    """Set up Smartbox from a config entry."""
+    """Set up Smartbox from a config entry.
+
+    When the entry is set up again within RUNTIME_CACHE_GRACE_PERIOD of its
+    unload, its session and devices are reused as they are. Otherwise, when a
+    snapshot of a previous setup is stored, the entities are created from it
+    straight away and reconciled with the API in the background.
+    """
+    if (cached := _async_pop_cached_runtime_data(hass, entry)) is not None:
+        _LOGGER.debug("Reusing the session and devices of %s", entry.title)
+        entry.runtime_data = SmartboxData(
+            client=cached.client,
+            devices=[],
+            nodes=[],
+            store=cached.store,
+            options=dict(entry.options),
+            discovered=True,
+        )
+        await _async_setup_devices(hass, entry, cached.devices)
+        return True
+
+    store = _snapshot_store(hass, entry)
+    snapshot = await store.async_load()
+    session_factory = _session_factory(hass)
     try:
         entry.runtime_data = SmartboxData(
-            client=(await create_smartbox_session_from_entry(hass, entry)),
+            client=(
+                await session_factory.async_get_session(
+                    entry.data, validate=snapshot is None
+                )
+            ),
             devices=[],
             nodes=[],
+            store=store,
+            options=dict(entry.options),
         )
     except InvalidAuthError as ex:
         raise ConfigEntryAuthFailed from ex
     except (SmartboxError, APIUnavailableError) as ex:
         raise ConfigEntryNotReady from ex
 
-    devices = await get_devices(session=entry.runtime_data.client, hass=hass)
+    failed_devices: list[Device] = []
+    if snapshot is None:
+        try:
+            devices, failed_devices = await get_devices(
+                session=entry.runtime_data.client, hass=hass
+            )
+        except InvalidAuthError as ex:
+            raise ConfigEntryAuthFailed from ex
+        except (SmartboxError, APIUnavailableError) as ex:
+            raise ConfigEntryNotReady from ex
+    else:
+        devices = [
+            SmartboxDevice.from_snapshot(
+                device_snapshot, entry.runtime_data.client, hass
+            )
+            for device_snapshot in snapshot["devices"]
+        ]
+    await _async_setup_devices(hass, entry, devices)
+    if snapshot is not None:
+        entry.async_create_background_task(
+            hass,
+            _async_reconcile_devices(hass, entry),
+            f"{DOMAIN}_{entry.entry_id}_reconcile_devices",
+        )
+        return True
+    _async_save_snapshot(entry)
+    if failed_devices:
+        entry.async_create_background_task(
+            hass,
+            _async_retry_devices(hass, entry, failed_devices),
+            f"{DOMAIN}_{entry.entry_id}_retry_devices",
+        )
+    else:
+        entry.runtime_data.discovered = True
+    return True
+
+
+async def _async_setup_devices(
+    hass: HomeAssistant, entry: SmartboxConfigEntry, devices: list[SmartboxDevice]
+) -> None:
+    """Add the devices and their nodes, and set up the platforms."""
     for device in devices:
-        _LOGGER.info("Setting up configured device %s", device.dev_id)
-        entry.runtime_data.devices.append(device)
+        _async_add_device(entry, device)
     for device in entry.runtime_data.devices:
         nodes = device.get_nodes()
         _LOGGER.debug("Configuring nodes for device %s %s", device.dev_id, nodes)
@@ -93,16 +311,296 @@ async def async_setup_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) ->
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     entry.async_on_unload(entry.add_update_listener(update_listener))
-    return True
+
+
+@callback
+def _async_save_snapshot(entry: SmartboxConfigEntry) -> None:
+    """Schedule saving the snapshot used on the next start."""
+    entry.runtime_data.store.async_delay_save(
+        entry.runtime_data.as_snapshot, SNAPSHOT_SAVE_DELAY
+    )
+
+
+@callback
+def _async_add_device(entry: SmartboxConfigEntry, device: SmartboxDevice) -> None:
+    """Add a device, saving the snapshot when its samples cursors move."""
+    _LOGGER.info("Setting up configured device %s", device.dev_id)
+    entry.runtime_data.devices.append(device)
+    entry.async_on_unload(
+        device.add_listener("samples", partial(_async_save_snapshot, entry))
+    )
+
+
+@callback
+def async_add_devices(
+    hass: HomeAssistant, entry: SmartboxConfigEntry, devices: list[SmartboxDevice]
+) -> None:
+    """Add the devices and nodes found after setup and notify the platforms.
+
+    The nodes no longer found on their device are removed.
+    """
+    known_nodes = set(entry.runtime_data.nodes)
+    nodes: list[SmartboxNode] = []
+    for device in devices:
+        if device not in entry.runtime_data.devices:
+            _async_add_device(entry, device)
+        device_nodes = set(device.get_nodes())
+        nodes.extend(node for node in device_nodes if node not in known_nodes)
+        _async_remove_nodes(
+            hass,
+            entry,
+            [
+                node
+                for node in known_nodes
+                if node.device is device and node not in device_nodes
+            ],
+        )
+    if nodes:
+        entry.runtime_data.nodes.extend(nodes)
+        async_dispatcher_send(hass, f"{DOMAIN}_{entry.entry_id}_new_nodes", nodes)
+    _async_save_snapshot(entry)
+
+
+@callback
+def _async_remove_nodes(
+    hass: HomeAssistant, entry: SmartboxConfigEntry, nodes: list[SmartboxNode]
+) -> None:
+    """Remove nodes, along with their devices and entities from the registries."""
+    if not nodes:
+        return
+    entry.runtime_data.nodes = [
+        node for node in entry.runtime_data.nodes if node not in nodes
+    ]
+    device_registry = dr.async_get(hass)
+    for node in nodes:
+        if (
+            device_entry := device_registry.async_get_device(
+                identifiers={(DOMAIN, node.node_id)}
+            )
+        ) is not None:
+            device_registry.async_update_device(
+                device_entry.id, remove_config_entry_id=entry.entry_id
+            )
+
+
+async def _async_reconcile_devices(
+    hass: HomeAssistant, entry: SmartboxConfigEntry
+) -> None:
+    """Reconcile the devices restored from the snapshot with the API."""
+    session = entry.runtime_data.client
+    interval = DEVICE_RETRY_INTERVAL
+    while True:
+        try:
+            await _session_factory(hass).async_health_check(
+                entry.data[CONF_API_NAME], session
+            )
+            await session.check_refresh_auth()
+            session_devices = await get_session_devices(session)
+            break
+        except InvalidAuthError:
+            entry.async_start_reauth(hass)
+            return
+        except (SmartboxError, APIUnavailableError) as ex:
+            _LOGGER.warning(
+                "Unable to reach the Smartbox API, retrying in %s s: %r", interval, ex
+            )
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, DEVICE_RETRY_MAX_INTERVAL)
+
+    dev_ids = {session_device["dev_id"] for session_device in session_devices}
+    gone = [
+        device for device in entry.runtime_data.devices if device.dev_id not in dev_ids
+    ]
+    for device in gone:
+        _LOGGER.warning("Device %s is no longer available", device.dev_id)
+        entry.runtime_data.devices.remove(device)
+        _async_remove_nodes(
+            hass,
+            entry,
+            [node for node in entry.runtime_data.nodes if node.device is device],
+        )
+    if gone:
+        _async_save_snapshot(entry)
+        await _async_cancel_devices(hass, entry.entry_id, gone)
+    await _async_retry_devices(hass, entry, session_devices, immediate=True)
+
+
+async def _async_retry_devices(
+    hass: HomeAssistant,
+    entry: SmartboxConfigEntry,
+    failed_devices: list[Device],
+    *,
+    immediate: bool = False,
+) -> None:
+    """Retry the devices that failed during setup, backing off between rounds.
+
+    Devices restored from the snapshot are reconciled instead of recreated.
+    """
+    delay = 0 if immediate else DEVICE_RETRY_INTERVAL
+    while failed_devices:
+        await asyncio.sleep(delay)
+        _LOGGER.debug(
+            "Retrying devices %s", [device["dev_id"] for device in failed_devices]
+        )
+        try:
+            devices, failed_devices = await initialise_devices(
+                failed_devices,
+                entry.runtime_data.client,
+                hass,
+                restored={
+                    device.dev_id: device for device in entry.runtime_data.devices
+                },
+            )
+        except InvalidAuthError:
+            entry.async_start_reauth(hass)
+            return
+        if devices:
+            async_add_devices(hass, entry, devices)
+        delay = min(max(delay * 2, DEVICE_RETRY_INTERVAL), DEVICE_RETRY_MAX_INTERVAL)
+    entry.runtime_data.discovered = True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) -> bool:
-    """Unload a config entry."""
-    for device in entry.runtime_data.devices:
-        await device.cancel()
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    """Unload a config entry.
+
+    Once every device is set up, the session and devices are kept connected
+    for RUNTIME_CACHE_GRACE_PERIOD, for a reload to reuse them.
+    """
+    await entry.runtime_data.store.async_save(entry.runtime_data.as_snapshot())
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded and entry.runtime_data.discovered:
+        _async_cache_runtime_data(hass, entry)
+    else:
+        await _async_cancel_devices(hass, entry.entry_id, entry.runtime_data.devices)
+    return unloaded
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: SmartboxConfigEntry) -> None:
+    """Remove the snapshot of a config entry."""
+    if (
+        cached := hass.data.get(SMARTBOX_RUNTIME_CACHE, {}).pop(entry.entry_id, None)
+    ) is not None:
+        cached.cancel_expiry()
+        await _async_cancel_devices(hass, entry.entry_id, cached.data.devices)
+    await _snapshot_store(hass, entry).async_remove()
+
+
+async def _async_cancel_devices(
+    hass: HomeAssistant, entry_id: str, devices: list[SmartboxDevice]
+) -> None:
+    """Disconnect the devices concurrently, within DEVICE_TEARDOWN_TIMEOUT.
+
+    The devices still disconnecting at the deadline are aborted. How long each
+    device took is kept for the diagnostics of the entry, as the last teardown
+    of the device.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    teardown: dict[str, dict[str, Any]] = {}
+
+    async def _async_cancel(device: SmartboxDevice) -> None:
+        try:
+            await device.cancel()
+        except Exception as ex:  # noqa: BLE001
+            _LOGGER.warning("Unable to disconnect device %s: %r", device.dev_id, ex)
+        teardown[device.dev_id] = {
+            "duration": round(loop.time() - start, 3),
+            "aborted": False,
+        }
+
+    tasks = {asyncio.create_task(_async_cancel(device)): device for device in devices}
+    if not tasks:
+        return
+    _, pending = await asyncio.wait(tasks, timeout=DEVICE_TEARDOWN_TIMEOUT)
+    for task in pending:
+        device = tasks[task]
+        _LOGGER.warning(
+            "Device %s did not disconnect within %s s, aborting it",
+            device.dev_id,
+            DEVICE_TEARDOWN_TIMEOUT,
+        )
+        task.cancel()
+        device.abort()
+        teardown[device.dev_id] = {
+            "duration": round(loop.time() - start, 3),
+            "aborted": True,
+        }
+    _async_record_teardown(hass, entry_id, teardown)
+
+
+@callback
+def _async_record_teardown(
+    hass: HomeAssistant, entry_id: str, teardown: dict[str, dict[str, Any]]
+) -> None:
+    """Keep the last teardown of each device for the diagnostics of the entry."""
+    hass.data.setdefault(SMARTBOX_TEARDOWN, {}).setdefault(entry_id, {}).update(
+        teardown
+    )
+
+
+@callback
+def _async_cache_runtime_data(hass: HomeAssistant, entry: SmartboxConfigEntry) -> None:
+    """Keep the runtime data of an unloaded entry until the grace period ends.
+
+    The devices are recorded as cached in the diagnostics until then.
+    """
+    cache: dict[str, CachedRuntimeData] = hass.data.setdefault(
+        SMARTBOX_RUNTIME_CACHE, {}
+    )
+    data = entry.runtime_data
+    _async_record_teardown(
+        hass,
+        entry.entry_id,
+        {device.dev_id: {"cached": True} for device in data.devices},
+    )
+
+    async def _async_expire(_: Any) -> None:  # noqa: ANN401
+        if cache.get(entry.entry_id) is cached:
+            del cache[entry.entry_id]
+            await _async_cancel_devices(hass, entry.entry_id, data.devices)
+
+    cached = CachedRuntimeData(
+        data=data,
+        entry_data=dict(entry.data),
+        cancel_expiry=async_call_later(hass, RUNTIME_CACHE_GRACE_PERIOD, _async_expire),
+    )
+    cache[entry.entry_id] = cached
+
+
+@callback
+def _async_pop_cached_runtime_data(
+    hass: HomeAssistant, entry: SmartboxConfigEntry
+) -> SmartboxData | None:
+    """Return the runtime data kept for the entry, if its login is unchanged."""
+    cached = hass.data.get(SMARTBOX_RUNTIME_CACHE, {}).pop(entry.entry_id, None)
+    if cached is None:
+        return None
+    cached.cancel_expiry()
+    if cached.entry_data != dict(entry.data):
+        hass.async_create_background_task(
+            _async_cancel_devices(hass, entry.entry_id, cached.data.devices),
+            f"{DOMAIN}_{entry.entry_id}_cancel_devices",
+        )
+        return None
+    return cached.data
 
 
 async def update_listener(hass: HomeAssistant, entry: SmartboxConfigEntry) -> None:
-    """Reload entity from config entry."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Apply the changed options, reloading the entry only when needed.
+
+    The options in HOT_APPLIED_OPTIONS are sent to the platforms and entities,
+    which apply them in place.
+    """
+    options = entry.runtime_data.options
+    changed = {
+        key
+        for key in options.keys() | entry.options.keys()
+        if options.get(key) != entry.options.get(key)
+    }
+    entry.runtime_data.options = dict(entry.options)
+    if changed - HOT_APPLIED_OPTIONS:
+        await hass.config_entries.async_reload(entry.entry_id)
+    elif changed:
+        async_dispatcher_send(
+            hass, f"{DOMAIN}_{entry.entry_id}_options_updated", changed
+        )
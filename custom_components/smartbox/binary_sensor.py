@@ -7,35 +7,36 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
 )
 from homeassistant.const import EntityCategory
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import SmartboxConfigEntry
-from .entity import SmartBoxNodeEntity
+from .entity import SmartBoxNodeEntity, async_setup_node_entities
+from .models import SmartboxNode
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(
-    _: HomeAssistant,
+    hass: HomeAssistant,
     entry: SmartboxConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up platform."""
     _LOGGER.debug("Setting up Smartbox binary sensor platform")
 
-    async_add_entities(
-        [Connected(node, entry) for node in entry.runtime_data.nodes],
-        update_before_add=True,
-    )
-    async_add_entities(
-        [
-            LockBinarySensor(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.heater_node
-        ],
-        update_before_add=True,
-    )
+    @callback
+    def _async_add_nodes(nodes: list[SmartboxNode]) -> None:
+        async_add_entities(
+            [Connected(node, entry) for node in nodes],
+            update_before_add=True,
+        )
+        async_add_entities(
+            [LockBinarySensor(node, entry) for node in nodes if node.heater_node],
+            update_before_add=True,
+        )
+
+    async_setup_node_entities(hass, entry, _async_add_nodes)
     _LOGGER.debug("Finished setting up Smartbox binary sensor platform")
 
 
@@ -58,6 +59,7 @@ class LockBinarySensor(SmartBoxNodeEntity, BinarySensorEntity):
 
     _attr_key = "lock"
     _attr_websocket_event = "status"
+    _attr_status_fields = frozenset({"locked"})
     device_class = BinarySensorDeviceClass.LOCK
     entity_category = EntityCategory.DIAGNOSTIC
 
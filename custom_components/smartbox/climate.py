@@ -1,10 +1,13 @@
 """Support for Smartbox climate entities."""
 
+import asyncio
 import logging
 from typing import Any
 from unittest.mock import MagicMock
 
 from homeassistant.components.climate import (
+    ATTR_HVAC_MODE,
+    ATTR_PRESET_MODE,
     PRESET_ACTIVITY,
     PRESET_AWAY,
     PRESET_BOOST,
@@ -18,18 +21,28 @@ from homeassistant.components.climate import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import ATTR_LOCKED, ATTR_TEMPERATURE, UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+import voluptuous as vol
 
 from . import SmartboxConfigEntry
 from .const import (
+    DOMAIN,
     GITHUB_ISSUES_URL,
     PRESET_FROST,
     PRESET_SCHEDULE,
     PRESET_SELF_LEARN,
+    SERVICE_BULK_SET,
     SmartboxNodeType,
 )
-from .entity import SmartBoxNodeEntity
+from .entity import SmartBoxNodeEntity, async_setup_node_entities, async_target_nodes
 from .models import (
     SmartboxNode,
     _check_status_key,
@@ -43,32 +56,128 @@ from .models import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Presets set through the node status, the away preset being set on the device
+BULK_SET_PRESET_MODES = [
+    PRESET_ACTIVITY,
+    PRESET_BOOST,
+    PRESET_COMFORT,
+    PRESET_ECO,
+    PRESET_FROST,
+    PRESET_SCHEDULE,
+    PRESET_SELF_LEARN,
+]
+
 
 async def async_setup_entry(
-    _: HomeAssistant,
+    hass: HomeAssistant,
     entry: SmartboxConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up platform."""
     _LOGGER.info("Setting up Smartbox climate platform")
 
-    async_add_entities(
-        [
-            SmartboxHeater(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.heater_node
-        ],
-        update_before_add=True,
+    @callback
+    def _async_add_nodes(nodes: list[SmartboxNode]) -> None:
+        async_add_entities(
+            [SmartboxHeater(node, entry) for node in nodes if node.heater_node],
+            update_before_add=True,
+        )
+
+    async_setup_node_entities(hass, entry, _async_add_nodes)
+
+    async def handle_bulk_set(call: ServiceCall) -> ServiceResponse:
+        """Handle the service call."""
+        return await async_bulk_set(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_SET,
+        handle_bulk_set,
+        schema=vol.All(
+            vol.Schema(
+                {
+                    vol.Exclusive(ATTR_HVAC_MODE, "mode"): vol.In(
+                        [HVACMode.HEAT, HVACMode.AUTO, HVACMode.OFF]
+                    ),
+                    vol.Exclusive(ATTR_PRESET_MODE, "mode"): vol.In(
+                        BULK_SET_PRESET_MODES
+                    ),
+                    vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+                    **(cv.ENTITY_SERVICE_FIELDS),
+                },
+            ),
+            cv.has_at_least_one_key(ATTR_HVAC_MODE, ATTR_PRESET_MODE, ATTR_TEMPERATURE),
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
     )
     _LOGGER.debug("Finished setting up Smartbox climate platform")
 
 
+async def async_bulk_set(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Set a mode and temperature on the targeted nodes, concurrently.
+
+    The HVAC mode, preset mode and temperature are translated to the status of
+    each node type, as the climate entities do. The writes of every node are queued at once, so they share a write window,
+    and the write limiter of each device bounds the requests in flight. The
+    result of every node is returned, a failed write not stopping others.
+    """
+    nodes = [node for node in async_target_nodes(hass, call) if node.heater_node]
+
+    async def _set_status(node: SmartboxNode) -> dict[str, Any]:
+        try:
+            await node.set_status(**bulk_set_status_args(node, call.data))
+        except Exception as ex:  # noqa: BLE001
+            _LOGGER.warning("Unable to set the status of %s: %r", node.name, ex)
+            return {"success": False, "error": str(ex)}
+        return {"success": True}
+
+    results = await asyncio.gather(*(_set_status(node) for node in nodes))
+    return {node.node_id: result for node, result in zip(nodes, results, strict=True)}
+
+
+def bulk_set_status_args(node: SmartboxNode, data: dict[str, Any]) -> dict[str, Any]:
+    """Translate the bulk set of a mode and temperature to a node status."""
+    status_args: dict[str, Any] = {}
+    if (hvac_mode := data.get(ATTR_HVAC_MODE)) is not None:
+        status_args = set_hvac_mode_args(node.node_type, node.status, hvac_mode)
+        if node.boost:
+            status_args["boost"] = False
+    if (preset_mode := data.get(ATTR_PRESET_MODE)) == PRESET_BOOST:
+        status_args = {"boost": True}
+    elif preset_mode is not None:
+        status_args = set_preset_mode_status_update(
+            node.node_type, node.status, preset_mode
+        )
+    if (temp := data.get(ATTR_TEMPERATURE)) is not None:
+        status_args |= set_temperature_args(
+            node.node_type, node.status | status_args, temp
+        )
+    return status_args
+
+
 class SmartboxHeater(SmartBoxNodeEntity, ClimateEntity):
     """Smartbox heater climate control."""
 
     _attr_key = "thermostat"
     _attr_name = None
     _attr_websocket_event = "status"
+    _attr_status_fields = frozenset(
+        {
+            "active",
+            "boost",
+            "charging",
+            "comfort_temp",
+            "eco_offset",
+            "ice_temp",
+            "locked",
+            "mode",
+            "mtemp",
+            "on",
+            "selected_temp",
+            "stemp",
+            "units",
+        }
+    )
     _attr_supported_features = (
         ClimateEntityFeature.TARGET_TEMPERATURE
         | ClimateEntityFeature.PRESET_MODE
@@ -30,6 +30,7 @@ from . import (
     InvalidAuthError,
     SmartboxConfigEntry,
     SmartboxError,
+    async_hand_over_session,
     create_smartbox_session_from_entry,
 )
 from .const import (
@@ -99,7 +100,9 @@ class SmartboxConfigFlow(ConfigFlow, domain=DOMAIN):
         placeholders: dict[str, str] = {}
         if user_input is not None:
             try:
-                await create_smartbox_session_from_entry(self.hass, user_input)
+                session = await create_smartbox_session_from_entry(
+                    self.hass, user_input
+                )
             except APIUnavailableError as ex:
                 errors["base"] = "cannot_connect"
                 placeholders["error"] = str(ex)
@@ -114,6 +117,7 @@ class SmartboxConfigFlow(ConfigFlow, domain=DOMAIN):
                     f"{AvailableResellers(api_url=user_input[CONF_API_NAME]).api_url}_{user_input[CONF_USERNAME]}"
                 )
                 self._abort_if_unique_id_configured()
+                async_hand_over_session(self.hass, user_input, session)
                 return self.async_create_entry(
                     title=f"{AvailableResellers(api_url=user_input[CONF_API_NAME]).name} {user_input[CONF_USERNAME]}",
                     data=user_input,
@@ -143,7 +147,9 @@ class SmartboxConfigFlow(ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             user_input = {**self.current_user_inputs, **user_input}
             try:
-                await create_smartbox_session_from_entry(self.hass, user_input)
+                session = await create_smartbox_session_from_entry(
+                    self.hass, user_input
+                )
             except APIUnavailableError as ex:
                 errors["base"] = "cannot_connect"
                 placeholders["error"] = str(ex)
@@ -158,6 +164,7 @@ class SmartboxConfigFlow(ConfigFlow, domain=DOMAIN):
                     f"{AvailableResellers(api_url=user_input[CONF_API_NAME]).api_url}_{user_input[CONF_USERNAME]}"
                 )
                 self._abort_if_unique_id_mismatch(reason="invalid_auth")
+                async_hand_over_session(self.hass, user_input, session)
                 return self.async_update_reload_and_abort(
                     self._get_reauth_entry(),
                     data_updates=user_input,
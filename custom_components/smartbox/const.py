@@ -7,6 +7,8 @@ from smartbox import SmartboxNodeType
 DOMAIN = "smartbox"
 
 ATTR_DURATION = "duration"
+ATTR_POLL_INTERVAL = "poll_interval"
+SERVICE_BULK_SET = "bulk_set"
 SERVICE_SET_BOOST_PARAMS = "set_boost_params"
 CONF_API_NAME = "api_name"
 CONF_DISPLAY_ENTITY_PICTURES = "reseller_entity"
@@ -15,6 +17,30 @@ CONF_TIMEDELTA_POWER = "timedelta_update_power"
 DEFAULT_TIMEDELTA_POWER = 60
 DEFAULT_BOOST_TIME = 60
 DEFAULT_BOOST_TEMP = 21.0
+DEFAULT_MAX_CONCURRENT_REQUESTS = 5
+DEFAULT_MAX_CONCURRENT_DEVICES = 4
+DEFAULT_DEVICE_TIMEOUT = 60
+DEVICE_TEARDOWN_TIMEOUT = 10
+DEFAULT_COALESCE_WINDOW = 0
+DEFAULT_WRITE_WINDOW = 0.3
+DEFAULT_SAMPLES_INTERVAL = 900
+DEFAULT_SAMPLES_JITTER = 30
+SAMPLES_WINDOW = 24 * 3600
+SAMPLES_CURSOR_OVERLAP = 3600
+DEFAULT_MAX_CONCURRENT_BACKFILLS = 2
+BACKFILL_PERIOD = 3 * 365 * 24 * 3600
+BACKFILL_CHUNK = 30 * 24 * 3600
+BACKFILL_RETRY_INTERVAL = 60
+BACKFILL_RETRY_MAX_INTERVAL = 3600
+DEFAULT_POWER_POLL_JITTER = 5
+POWER_POLL_BACKOFF_FACTOR = 8
+DEVICE_RETRY_INTERVAL = 60
+DEVICE_RETRY_MAX_INTERVAL = 900
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 10
+RUNTIME_CACHE_GRACE_PERIOD = 60
+VALIDATED_SESSION_TTL = 60
+HEALTH_CHECK_TTL = 3600
 GITHUB_ISSUES_URL = "https://github.com/ajtudela/hass-smartbox/issues"
 
 HEATER_NODE_TYPES = [
@@ -31,10 +57,17 @@ PRESET_BOOST = "boost"
 
 SMARTBOX_DEVICES = "smartbox_devices"
 SMARTBOX_NODES = "smartbox_nodes"
-SMARTBOX_SESSIONS = "smartbox_sessions"
+SMARTBOX_RUNTIME_CACHE = "smartbox_runtime_cache"
+SMARTBOX_SESSION_FACTORY = "smartbox_session_factory"
+SMARTBOX_TEARDOWN = "smartbox_teardown"
 
 CONF_HISTORY_CONSUMPTION = "history_consumption"
 
+# Options applied to the running entry, changing others reloads it
+HOT_APPLIED_OPTIONS = frozenset(
+    {CONF_DISPLAY_ENTITY_PICTURES, CONF_HISTORY_CONSUMPTION, CONF_TIMEDELTA_POWER}
+)
+
 
 class HistoryConsumptionStatus(StrEnum):
     """Config Consumption History Status."""
@@ -8,6 +8,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry as dr, entity_registry as er
 
 from . import SmartboxConfigEntry
+from .const import SMARTBOX_TEARDOWN
 
 TO_REDACT = [CONF_PASSWORD, CONF_USERNAME, "title", "unique_id"]
 
@@ -25,6 +26,24 @@ async def async_get_config_entry_diagnostics(
                 for e in config_entry.runtime_data.nodes
             ],
             "devices": [d.device for d in config_entry.runtime_data.devices],
+            "updates": {
+                d.dev_id: {
+                    "received": d.received_updates,
+                    "merged": d.merged_updates,
+                    "suppressed_writes": d.suppressed_writes,
+                    "listeners": d.listener_count
+                    + sum(n.listener_count for n in d.get_nodes()),
+                }
+                for d in config_entry.runtime_data.devices
+            },
+            "backfill": {
+                n.node_id: {**n.backfill, "progress": n.backfill_progress}
+                for n in config_entry.runtime_data.nodes
+                if n.backfill is not None
+            },
+            "teardown": hass.data.get(SMARTBOX_TEARDOWN, {}).get(
+                config_entry.entry_id, {}
+            ),
         },
     }
     diagnostics_data["hass_devices"] = [
@@ -1,27 +1,107 @@
 """Generic entity."""
 
+from collections.abc import Callable
 from typing import Any
 
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.helpers import (
+    device_registry as dr,
+    entity_platform,
+    entity_registry as er,
+)
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, Entity
+from homeassistant.helpers.target import (
+    TargetSelection,
+    async_extract_referenced_entity_ids,
+)
 
 from . import SmartboxConfigEntry
 from .const import CONF_DISPLAY_ENTITY_PICTURES, DOMAIN
 from .models import SmartboxDevice, SmartboxNode
 
 
+@callback
+def async_setup_node_entities(
+    hass: HomeAssistant,
+    entry: SmartboxConfigEntry,
+    add_nodes: Callable[[list[SmartboxNode]], None],
+    options_updated: Callable[[set[str]], None] | None = None,
+) -> None:
+    """Add entities for the current nodes and for nodes discovered later.
+
+    Changed options are handled once for the platform, by options_updated if
+    given, then applied to each of its entities.
+    """
+    platform = entity_platform.async_get_current_platform()
+
+    @callback
+    def _async_options_updated(changed: set[str]) -> None:
+        if options_updated is not None:
+            options_updated(changed)
+        for entity in list(platform.entities.values()):
+            if isinstance(entity, DefaultSmartBoxEntity):
+                entity.async_options_updated(changed)
+
+    add_nodes(entry.runtime_data.nodes)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, f"{DOMAIN}_{entry.entry_id}_new_nodes", add_nodes
+        )
+    )
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            f"{DOMAIN}_{entry.entry_id}_options_updated",
+            _async_options_updated,
+        )
+    )
+
+
+@callback
+def async_target_nodes(hass: HomeAssistant, call: ServiceCall) -> list[SmartboxNode]:
+    """Return the nodes of the entities, devices and areas targeted by a call.
+
+    The targets are resolved through the registries, indexed by id, to the
+    node ids of the device identifiers.
+    """
+    selected = async_extract_referenced_entity_ids(hass, TargetSelection(call.data))
+    entity_registry = er.async_get(hass)
+    device_ids = set(selected.referenced_devices)
+    for entity_id in selected.referenced | selected.indirectly_referenced:
+        entity = entity_registry.async_get(entity_id)
+        if entity is not None and entity.device_id is not None:
+            device_ids.add(entity.device_id)
+    device_registry = dr.async_get(hass)
+    node_ids = {
+        identifier
+        for device_id in device_ids
+        if (device := device_registry.async_get(device_id)) is not None
+        for domain, identifier in device.identifiers
+        if domain == DOMAIN
+    }
+    return [
+        node
+        for entry in hass.config_entries.async_loaded_entries(DOMAIN)
+        for node in entry.runtime_data.nodes
+        if node.node_id in node_ids
+    ]
+
+
 class DefaultSmartBoxEntity(Entity):
     """Default Smartbox Entity."""
 
     _node: SmartboxNode
     _attr_key: str
     _attr_websocket_event: str
+    # Status fields the entity depends on, None for all of them
+    _attr_status_fields: frozenset[str] | None = None
     _attr_should_poll = False
     _attr_has_entity_name = True
 
     def __init__(self, entry: SmartboxConfigEntry) -> None:
         """Initialize the default Device Entity."""
+        self.config_entry = entry
         self._device_id = self._node.node_id
         self._status: dict[str, Any] = {}
         self._available = False
@@ -29,8 +109,20 @@ class DefaultSmartBoxEntity(Entity):
         self._attr_unique_id = self._node.node_id
         self._reseller = self._node.session.reseller
         self._configuration_url = f"{self._reseller.web_url}#/{self._node.device.home['id']}/dev/{self._device_id}/{self._node.node_type}/{self._node.addr}/setup"
+        self._attr_entity_picture = self._entity_picture(entry)
+
+    def _entity_picture(self, entry: SmartboxConfigEntry) -> str | None:
+        """Return the entity picture, if the options display it."""
         if entry.options.get(CONF_DISPLAY_ENTITY_PICTURES, False) is True:
-            self._attr_entity_picture = f"{self._reseller.web_url}img/favicon.ico"
+            return f"{self._reseller.web_url}img/favicon.ico"
+        return None
+
+    @callback
+    def async_options_updated(self, changed: set[str]) -> None:
+        """Apply the changed options."""
+        if CONF_DISPLAY_ENTITY_PICTURES in changed:
+            self._attr_entity_picture = self._entity_picture(self.config_entry)
+            self.async_write_ha_state()
 
     @property
     def unique_id(self) -> str:
@@ -57,6 +149,13 @@ class DefaultSmartBoxEntity(Entity):
         self._attr_state = data
         self.async_write_ha_state()
 
+    @callback
+    def _async_status_update(self, status: dict[str, Any], changed: set[str]) -> None:
+        """Update the state if a status field the entity depends on changed."""
+        fields = self._attr_status_fields
+        if fields is None or not fields.isdisjoint(changed):
+            self._async_update(status)
+
 
 class SmartBoxDeviceEntity(DefaultSmartBoxEntity):
     """BaseClass for SmartBoxDeviceEntity."""
@@ -70,10 +169,10 @@ class SmartBoxDeviceEntity(DefaultSmartBoxEntity):
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
         if self._attr_should_poll is False:
-            async_dispatcher_connect(
-                self.hass,
-                f"{DOMAIN}_{self._device.dev_id}_{self._attr_websocket_event}",
-                self._async_update,
+            self.async_on_remove(
+                self._device.add_listener(
+                    self._attr_websocket_event, self._async_update
+                )
             )
 
 
@@ -98,8 +197,11 @@ class SmartBoxNodeEntity(DefaultSmartBoxEntity):
     async def async_added_to_hass(self) -> None:
         """Register callbacks."""
         if self._attr_should_poll is False:
-            async_dispatcher_connect(
-                self.hass,
-                f"{DOMAIN}_{self._node.node_id}_{self._attr_websocket_event}",
-                self._async_update,
+            self.async_on_remove(
+                self._node.add_listener(
+                    self._attr_websocket_event,
+                    self._async_status_update
+                    if self._attr_websocket_event == "status"
+                    else self._async_update,
+                )
             )
@@ -1,9 +1,12 @@
 """Models for Smartbox."""
 
 import asyncio
+from collections.abc import Awaitable, Callable, Iterable
 from datetime import datetime, timedelta
+from functools import partial
 import logging
 import math
+import random
 import time
 from typing import Any, cast
 from unittest.mock import MagicMock
@@ -20,18 +23,32 @@ from homeassistant.components.climate import (
 )
 from homeassistant.const import UnitOfTemperature
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 from smartbox import AsyncSmartboxSession, SmartboxNodeType, UpdateManager
+from smartbox.error import APIUnavailableError, SmartboxError
 
 from .const import (
+    BACKFILL_CHUNK,
     DEFAULT_BOOST_TEMP,
     DEFAULT_BOOST_TIME,
+    DEFAULT_COALESCE_WINDOW,
+    DEFAULT_DEVICE_TIMEOUT,
+    DEFAULT_MAX_CONCURRENT_BACKFILLS,
+    DEFAULT_MAX_CONCURRENT_DEVICES,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_POWER_POLL_JITTER,
+    DEFAULT_SAMPLES_INTERVAL,
+    DEFAULT_SAMPLES_JITTER,
+    DEFAULT_WRITE_WINDOW,
     DOMAIN,
     GITHUB_ISSUES_URL,
     HEATER_NODE_TYPES,
+    POWER_POLL_BACKOFF_FACTOR,
     PRESET_FROST,
     PRESET_SCHEDULE,
     PRESET_SELF_LEARN,
+    SAMPLES_CURSOR_OVERLAP,
+    SAMPLES_WINDOW,
     BoostConfig,
 )
 
@@ -43,9 +60,75 @@ StatusDict = dict[str, Any]
 SamplesDict = list[dict[str, Any]]
 Node = dict[str, Any]
 Device = dict[str, Any]
+NodeSnapshot = dict[str, Any]
+BackfillCheckpoint = dict[str, int]
+DeviceSnapshot = dict[str, Any]
 
 
-class SmartboxDevice:
+async def _gather_cancelling[T](aws: Iterable[Awaitable[T]]) -> list[T]:
+    """Run awaitables concurrently and return their results in order.
+
+    The first failure cancels the remaining work and is raised unchanged, as a
+    sequential loop would.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _limited[T](
+    limiter: asyncio.Semaphore | None, factory: Callable[[], Awaitable[T]]
+) -> T:
+    """Await the request built by factory once the limiter lets it through."""
+    if limiter is None:
+        return await factory()
+    async with limiter:
+        return await factory()
+
+
+# Events of a device, that node listeners are registered for on the device
+DEVICE_EVENTS = frozenset({"connected", "power_limit"})
+
+
+class ListenerRegistry:
+    """Listeners called directly on the events of a device or a node."""
+
+    def __init__(self) -> None:
+        """Initialise the registry."""
+        self._listeners: dict[str, dict[Callable[..., None], None]] = {}
+
+    def add_listener(
+        self, event: str, listener: Callable[..., None]
+    ) -> Callable[[], None]:
+        """Register a listener for an event and return its remover."""
+        listeners = self._listeners.setdefault(event, {})
+        listeners[listener] = None
+
+        def _remove() -> None:
+            listeners.pop(listener, None)
+
+        return _remove
+
+    def notify(self, event: str, *args: Any) -> None:  # noqa: ANN401
+        """Call the listeners of an event."""
+        for listener in list(self._listeners.get(event, ())):
+            try:
+                listener(*args)
+            except Exception:
+                _LOGGER.exception("Error in %s listener %s", event, listener)
+
+    @property
+    def listener_count(self) -> int:
+        """Return the number of live listeners."""
+        return sum(len(listeners) for listeners in self._listeners.values())
+
+
+class SmartboxDevice(ListenerRegistry):
     """Smartbox device."""
 
     def __init__(
@@ -53,8 +136,16 @@ class SmartboxDevice:
         device: Device,
         session: AsyncSmartboxSession | MagicMock,
         hass: HomeAssistant,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+        max_concurrent_writes: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
     ) -> None:
-        """Initialise a smartbox device."""
+        """Initialise a smartbox device.
+
+        Node updates received within coalesce_window seconds, or within the
+        same event loop iteration when it is 0, are notified once. At most
+        max_concurrent_writes node status writes are sent at the same time.
+        """
+        super().__init__()
         self._device = device
         self._session = session
         self._away: bool = False
@@ -63,10 +154,19 @@ class SmartboxDevice:
         self._watchdog_task: asyncio.Task | None = None
         self._hass = hass
         self._connected_status: bool | None = None
+        self._coalesce_window = coalesce_window
+        self._pending_status: dict[SmartboxNode, set[str]] = {}
+        self._pending_setup: dict[SmartboxNode, None] = {}
+        self._flush_handle: asyncio.Handle | None = None
+        self.received_updates = 0
+        self.merged_updates = 0
+        self.suppressed_writes = 0
+        self.write_limiter = asyncio.Semaphore(max_concurrent_writes)
         self.update_manager: UpdateManager = UpdateManager(
             self._session,
             self.dev_id,
         )
+        self.samples_coordinator = SamplesCoordinator(self, hass)
 
     @classmethod
     async def initialise_nodes(
@@ -74,27 +174,106 @@ class SmartboxDevice:
         device: Device,
         session: AsyncSmartboxSession | MagicMock,
         hass: HomeAssistant,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
     ) -> "SmartboxDevice":
-        """Initilaise nodes."""
+        """Initilaise nodes.
+
+        Nodes are created concurrently, with at most max_concurrent_requests
+        API requests in flight at the same time.
+        """
         self = cls(device=device, session=session, hass=hass)
-        # Would do in __init__, but needs to be a coroutine
-        self._connected_status = cast(
+        await self.refresh(max_concurrent_requests)
+        self.start()
+        return self
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        snapshot: DeviceSnapshot,
+        session: AsyncSmartboxSession | MagicMock,
+        hass: HomeAssistant,
+    ) -> "SmartboxDevice":
+        """Restore a device and its nodes from a snapshot, without any request.
+
+        The device is not started: call reconcile once the API is reachable.
+        """
+        self = cls(device=snapshot["device"], session=session, hass=hass)
+        self._away = snapshot["away"]
+        self._power_limit = snapshot["power_limit"]
+        for node_snapshot in snapshot["nodes"]:
+            node = SmartboxNode.from_snapshot(self, session, node_snapshot)
+            self._nodes[(node.node_type, node.addr)] = node
+        return self
+
+    def as_snapshot(self) -> DeviceSnapshot:
+        """Return the data needed to restore the device without the API."""
+        return {
+            "device": self._device,
+            "away": self._away,
+            "power_limit": self._power_limit,
+            "nodes": [node.as_snapshot() for node in self._nodes.values()],
+        }
+
+    async def reconcile(
+        self,
+        device: Device,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    ) -> None:
+        """Bring a device restored from a snapshot up to date and start it."""
+        self._device = device
+        await self.refresh(max_concurrent_requests)
+        self.start()
+
+    async def refresh(
+        self, max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS
+    ) -> None:
+        """Fetch the device and its nodes from the API.
+
+        Nodes already known are updated in place, so their entities keep
+        working, the new ones are added and the ones gone are dropped.
+        """
+        connected = cast(
             "dict[str, bool]", (await self._session.get_device_connected(self.dev_id))
         )["connected"]
-        self._away = cast(
+        away = cast(
             "dict[str, bool]", (await self._session.get_device_away_status(self.dev_id))
         )["away"]
 
         session_nodes = cast("list[Node]", await self._session.get_nodes(self.dev_id))
+        power_limit = self._power_limit
         if any(n.get("type") == SmartboxNodeType.PMO for n in session_nodes):
-            self._power_limit = await self._session.get_device_power_limit(self.dev_id)
-
-        for node_info in session_nodes:
-            node: SmartboxNode = await SmartboxNode.create(
-                device=self, node_info=node_info, session=self._session
+            power_limit = await self._session.get_device_power_limit(self.dev_id)
+
+        limiter = asyncio.Semaphore(max_concurrent_requests)
+        nodes = await _gather_cancelling(
+            SmartboxNode.create(
+                device=self,
+                node_info=node_info,
+                session=self._session,
+                limiter=limiter,
             )
-
-            self._nodes[(node.node_type, node.addr)] = node
+            for node_info in session_nodes
+        )
+        self._connected(connected)
+        self._away_status_update({"away": away})
+        self._power_limit_update(power_limit)
+        for node in nodes:
+            known = self._nodes.get((node.node_type, node.addr))
+            if known is None:
+                self._nodes[(node.node_type, node.addr)] = node
+                continue
+            known.reconcile(node)
+            self._node_status_update(node.node_type, node.addr, node.status)
+            self._node_setup_update(node.node_type, node.addr, node.setup)
+        fetched = {(node.node_type, node.addr) for node in nodes}
+        for key in set(self._nodes) - fetched:
+            _LOGGER.warning("Node %s %s of device %s is gone", *key, self.dev_id)
+            self._nodes.pop(key).cancel_writes()
+
+    def start(self) -> None:
+        """Subscribe to the device updates and start listening for them."""
+        if self._watchdog_task is not None:
+            return
         _LOGGER.debug("Creating SocketSession for device %s", self.dev_id)
         self.update_manager.subscribe_to_device_connected(self._connected)
         self.update_manager.subscribe_to_device_away_status(self._away_status_update)
@@ -104,10 +283,11 @@ class SmartboxDevice:
 
         _LOGGER.debug("Starting UpdateManager task for device %s", self.dev_id)
         self._watchdog_task = asyncio.create_task(self.update_manager.run())
-        return self
 
     async def cancel(self) -> None:
         """Cancel the watchdog task and disconnect."""
+        self.samples_coordinator.cancel()
+        self._cancel_writes()
         await self.update_manager.cancel()
 
         if self._watchdog_task and not self._watchdog_task.done():
@@ -117,14 +297,30 @@ class SmartboxDevice:
             self._watchdog_task.cancel()
             await self._watchdog_task
 
+    def abort(self) -> None:
+        """Cancel the watchdog task without waiting for the disconnection."""
+        self.samples_coordinator.cancel()
+        self._cancel_writes()
+        if self._watchdog_task is not None:
+            self._watchdog_task.cancel()
+
+    def _cancel_writes(self) -> None:
+        """Drop the pending update notifications and node status writes."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for node in self._nodes.values():
+            node.cancel_writes()
+
+    @property
+    def hass(self) -> HomeAssistant:
+        """Return the Home Assistant instance."""
+        return self._hass
+
     def _connected(self, connected: bool) -> None:
         _LOGGER.debug("Connected connected update: %s", connected)
         self._connected_status = connected
-        async_dispatcher_send(
-            self._hass,
-            f"{DOMAIN}_{self.dev_id}_connected",
-            self._connected_status,
-        )
+        self.notify("connected", self._connected_status)
 
     def _away_status_update(self, away_status: dict[str, bool]) -> None:
         _LOGGER.debug("Away status update: %s", away_status)
@@ -132,17 +328,13 @@ class SmartboxDevice:
         if self._away != away_status["away"]:
             self._away = away_status["away"]
             for node in self._nodes.values():
-                async_dispatcher_send(
-                    self._hass, f"{DOMAIN}_{node.node_id}_away_status", self._away
-                )
+                node.notify("away_status", self._away)
 
     def _power_limit_update(self, power_limit: int) -> None:
         _LOGGER.debug("power_limit update: %s", power_limit)
         if self._power_limit != power_limit:
             self._power_limit = power_limit
-            async_dispatcher_send(
-                self._hass, f"{DOMAIN}_{self.dev_id}_power_limit", power_limit
-            )
+            self.notify("power_limit", power_limit)
 
     def _node_status_update(
         self, node_type: str, addr: int, node_status: StatusDict
@@ -152,11 +344,14 @@ class SmartboxDevice:
         _LOGGER.debug("Node status update: %s", node_status)
         if node_status is not None and (node_type, addr) in self._nodes:
             node: SmartboxNode | None = self._nodes.get((node_type, addr), None)
-            if node is not None and node.status != node_status:
-                node.update_status(node_status)
-                async_dispatcher_send(
-                    self._hass, f"{DOMAIN}_{node.node_id}_status", node_status
-                )
+            if node is not None and (changed := node.update_status(node_status)):
+                self.received_updates += 1
+                if (pending := self._pending_status.get(node)) is not None:
+                    pending |= changed
+                    self.merged_updates += 1
+                else:
+                    self._pending_status[node] = set(changed)
+                self._schedule_flush()
         else:
             _LOGGER.error(
                 "Received status update for unknown node %s %s", node_type, addr
@@ -170,14 +365,38 @@ class SmartboxDevice:
             node: SmartboxNode | None = self._nodes.get((node_type, addr), None)
             if node is not None and node.setup != node_setup:
                 node.update_setup(node_setup)
-                async_dispatcher_send(
-                    self._hass, f"{DOMAIN}_{node.node_id}_setup", node_setup
-                )
+                self.received_updates += 1
+                if node in self._pending_setup:
+                    self.merged_updates += 1
+                else:
+                    self._pending_setup[node] = None
+                self._schedule_flush()
         else:
             _LOGGER.error(
                 "Received setup update for unknown node %s %s", node_type, addr
             )
 
+    def _schedule_flush(self) -> None:
+        """Notify the pending node updates once the window is over."""
+        if self._flush_handle is not None:
+            return
+        if self._coalesce_window > 0:
+            self._flush_handle = self._hass.loop.call_later(
+                self._coalesce_window, self._flush_updates
+            )
+        else:
+            self._flush_handle = self._hass.loop.call_soon(self._flush_updates)
+
+    def _flush_updates(self) -> None:
+        """Notify one status and one setup update per updated node."""
+        self._flush_handle = None
+        pending_status, self._pending_status = self._pending_status, {}
+        pending_setup, self._pending_setup = self._pending_setup, {}
+        for node, changed in pending_status.items():
+            node.notify("status", node.status, changed)
+        for node in pending_setup:
+            node.notify("setup", node.setup)
+
     @property
     def device(self) -> Device:
         """Return the device."""
@@ -231,6 +450,9 @@ class SmartboxDevice:
 
     async def set_away_status(self, away: bool) -> None:
         """Set the away status."""
+        if away == self._away:
+            self.suppressed_writes += 1
+            return
         await self._session.set_device_away_status(self.dev_id, {"away": away})
         self._away_status_update(away_status={"away": away})
 
@@ -241,11 +463,14 @@ class SmartboxDevice:
 
     async def set_power_limit(self, power_limit: int) -> None:
         """Set the power limit of the device."""
+        if power_limit == self._power_limit:
+            self.suppressed_writes += 1
+            return
         await self._session.set_device_power_limit(self.dev_id, power_limit)
         self._power_limit = power_limit
 
 
-class SmartboxNode:
+class SmartboxNode(ListenerRegistry):
     """Smartbox Node."""
 
     def __init__(
@@ -259,13 +484,25 @@ class SmartboxNode:
         version: dict[str, str],
     ) -> None:
         """Initialise a smartbox node."""
+        super().__init__()
         self._device = device
         self._node_info = node_info
         self._session = session
         self._status = status
         self._setup = setup
         self._samples = samples
+        # timestamp of the last sample received, samples are fetched from there
+        self.samples_cursor: int | None = None
+        # start, end and next timestamp of the history backfill
+        self.backfill: BackfillCheckpoint | None = None
         self._version = version
+        # status writes issued within write_window seconds are merged
+        self.write_window: float = DEFAULT_WRITE_WINDOW
+        self._pending_status_args: StatusDict = {}
+        self._pending_status_writes: list[asyncio.Future[StatusDict]] = []
+        self._status_write_handle: asyncio.Handle | None = None
+        self._status_write_lock = asyncio.Lock()
+        self._status_write_tasks: set[asyncio.Task[None]] = set()
 
     @classmethod
     async def create(
@@ -273,35 +510,116 @@ class SmartboxNode:
         device: SmartboxDevice | MagicMock,
         session: AsyncSmartboxSession | MagicMock,
         node_info: Node,
+        limiter: asyncio.Semaphore | None = None,
     ) -> "SmartboxNode":
-        """Create a smartbox node."""
+        """Create a smartbox node.
+
+        The status, setup and version requests do not depend on each other and
+        are issued concurrently, each one going through limiter. Samples are
+        only loaded when the consumption sensor first updates.
+        """
+        dev_id = device.dev_id
+        requests: dict[str, Callable[[], Awaitable[Any]]] = {
+            "status": (
+                partial(session.get_node_status, dev_id, node_info)
+                if node_info["type"] != SmartboxNodeType.PMO
+                else partial(session.get_device_power_limit, dev_id, node_info)
+            ),
+            "setup": partial(session.get_node_setup, dev_id, node_info),
+            "version": partial(session.get_node_version, dev_id, node_info),
+        }
+        results = dict(
+            zip(
+                requests,
+                await asyncio.gather(
+                    *(_limited(limiter, request) for request in requests.values()),
+                    return_exceptions=True,
+                ),
+                strict=True,
+            )
+        )
+        if errors := {
+            name: result
+            for name, result in results.items()
+            if isinstance(result, BaseException)
+        }:
+            failed = ", ".join(f"{name} ({error!r})" for name, error in errors.items())
+            msg = (
+                f"Failed to create {node_info['type']} node {node_info['addr']}"
+                f" of device {dev_id}: {failed}"
+            )
+            _LOGGER.error(msg)
+            error = next(iter(errors.values()))
+            error.add_note(msg)
+            raise error
+
         status: StatusDict
         if node_info["type"] != SmartboxNodeType.PMO:
-            status = cast(
-                "StatusDict", await session.get_node_status(device.dev_id, node_info)
-            )
+            status = cast("StatusDict", results["status"])
         else:
             status = {
                 "sync_status": "ok",
                 "locked": False,
-                "power": await session.get_device_power_limit(device.dev_id, node_info),
+                "power": results["status"],
             }
-        setup: SetupDict = cast(
-            "SetupDict", await session.get_node_setup(device.dev_id, node_info)
+        setup: SetupDict = cast("SetupDict", results["setup"])
+        version: dict[str, str] = cast("dict[str, str]", results["version"])
+        return cls(device, node_info, session, status, setup, [], version)
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        device: SmartboxDevice | MagicMock,
+        session: AsyncSmartboxSession | MagicMock,
+        snapshot: NodeSnapshot,
+    ) -> "SmartboxNode":
+        """Restore a node from a snapshot, without samples."""
+        node = cls(
+            device,
+            snapshot["node_info"],
+            session,
+            snapshot["status"],
+            snapshot["setup"],
+            [],
+            snapshot["version"],
         )
-        samples: SamplesDict = cast(
-            "dict[str, Any]",
-            (
-                await session.get_node_samples(
-                    device.dev_id,
-                    node_info,
-                    int(time.time() - (3600 * 3)),
-                    int(time.time()),
-                )
-            ),
-        )["samples"]
-        version: dict[str, str] = cast("dict[str, str]", await session.get_node_version(device.dev_id, node_info))
-        return cls(device, node_info, session, status, setup, samples, version)
+        node.samples_cursor = snapshot.get("samples_cursor")
+        node.backfill = snapshot.get("backfill")
+        return node
+
+    def as_snapshot(self) -> NodeSnapshot:
+        """Return the data needed to restore the node without the API."""
+        return {
+            "node_info": self._node_info,
+            "status": self._status,
+            "setup": self._setup,
+            "version": self._version,
+            "samples_cursor": self.samples_cursor,
+            "backfill": self.backfill,
+        }
+
+    def reconcile(self, node: "SmartboxNode") -> None:
+        """Take the info and version of a freshly fetched node.
+
+        Status and setup go through the device update handlers so that the
+        entities are notified. The status of a PMO node is updated in place, as
+        its entities hold on to it.
+        """
+        self._node_info = node.node_info
+        self._version = node.version
+        if self.node_type == SmartboxNodeType.PMO:
+            self._status |= node.status
+
+    def add_listener(
+        self, event: str, listener: Callable[..., None]
+    ) -> Callable[[], None]:
+        """Register a listener for an event and return its remover.
+
+        Listeners of device events are registered on the device of the node.
+        """
+        if event in DEVICE_EVENTS:
+            return self._device.add_listener(event, listener)
+        return super().add_listener(event, listener)
 
     @property
     def node_info(self) -> Node:
@@ -332,6 +650,7 @@ class SmartboxNode:
     def status(self) -> StatusDict:
         """Return the status of node."""
         return self._status
+
     @property
     def version(self) -> dict[str, str]:
         """Version info of node (includes PID)."""
@@ -359,10 +678,16 @@ class SmartboxNode:
             return pid[-pid_min_length:].upper()
         return None
 
-    def update_status(self, status: StatusDict) -> None:
-        """Update status."""
+    def update_status(self, status: StatusDict) -> set[str]:
+        """Update status and return the fields whose value changed."""
         _LOGGER.debug("Updating node %s status: %s", self.name, status)
+        changed = {
+            key
+            for key, value in status.items()
+            if key not in self._status or self._status[key] != value
+        }
         self._status |= {**status}
+        return changed
 
     @property
     def setup(self) -> SetupDict:
@@ -375,13 +700,83 @@ class SmartboxNode:
         self._setup = setup
 
     async def set_status(self, **status_args: Any) -> StatusDict:  # noqa: ANN401
-        """Set status."""
-        await self._session.set_node_status(
-            self._device.dev_id, self._node_info, status_args
+        """Set status.
+
+        The status arguments set within write_window seconds of the first one
+        are merged, the latest value of each winning, and written at once when
+        the window closes. Every caller waits for the write of its change.
+        """
+        loop = asyncio.get_running_loop()
+        self._pending_status_args |= status_args
+        future: asyncio.Future[StatusDict] = loop.create_future()
+        self._pending_status_writes.append(future)
+        if self._status_write_handle is None:
+            if self.write_window > 0:
+                self._status_write_handle = loop.call_later(
+                    self.write_window, self._flush_status
+                )
+            else:
+                self._status_write_handle = loop.call_soon(self._flush_status)
+        return await future
+
+    def _flush_status(self) -> None:
+        """Write the pending status arguments in the background."""
+        self._status_write_handle = None
+        status_args, self._pending_status_args = self._pending_status_args, {}
+        futures, self._pending_status_writes = self._pending_status_writes, []
+        task = self._device.hass.async_create_background_task(
+            self._write_status(status_args, futures),
+            f"{DOMAIN}_{self.node_id}_status_write",
         )
+        self._status_write_tasks.add(task)
+        task.add_done_callback(self._status_write_tasks.discard)
+
+    def cancel_writes(self) -> None:
+        """Cancel the pending and running status writes."""
+        if self._status_write_handle is not None:
+            self._status_write_handle.cancel()
+            self._status_write_handle = None
+        self._pending_status_args = {}
+        futures, self._pending_status_writes = self._pending_status_writes, []
+        for future in futures:
+            future.cancel()
+        for task in self._status_write_tasks:
+            task.cancel()
+
+    async def _write_status(
+        self, status_args: StatusDict, futures: list[asyncio.Future[StatusDict]]
+    ) -> None:
+        """Write merged status arguments, one write at a time, in order.
+
+        The write is skipped when all the arguments match the known status.
+        Otherwise they are all sent, as some nodes need the unchanged fields
+        along with the changed ones, e.g. selected_temp with an htr_mod mode.
+        """
+        try:
+            async with self._status_write_lock:
+                if all(
+                    self._status.get(key) == value for key, value in status_args.items()
+                ):
+                    self._device.suppressed_writes += 1
+                else:
+                    async with self._device.write_limiter:
+                        await self._session.set_node_status(
+                            self._device.dev_id, self._node_info, status_args
+                        )
+        except asyncio.CancelledError:
+            for future in futures:
+                future.cancel()
+            raise
+        except Exception as ex:  # noqa: BLE001
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ex)
+            return
         # update our status locally until we get an update
-        self._status |= {**status_args}
-        return self._status
+        self._status |= status_args
+        for future in futures:
+            if not future.done():
+                future.set_result(self._status)
 
     @property
     def away(self) -> bool:
@@ -416,6 +811,9 @@ class SmartboxNode:
 
     async def set_window_mode(self, window_mode: bool) -> bool:
         """Set window mode."""
+        if self._setup.get("window_mode_enabled") == window_mode:
+            self._device.suppressed_writes += 1
+            return window_mode
         await self._session.set_node_setup(
             self._device.dev_id,
             self._node_info,
@@ -434,6 +832,9 @@ class SmartboxNode:
 
     async def set_true_radiant(self, true_radiant: bool) -> None:
         """Set true radiant."""
+        if self._setup.get("true_radiant_enabled") == true_radiant:
+            self._device.suppressed_writes += 1
+            return
         await self._session.set_node_setup(
             self._device.dev_id,
             self._node_info,
@@ -442,12 +843,22 @@ class SmartboxNode:
         self._setup["true_radiant_enabled"] = true_radiant
 
     async def set_extra_options(self, options: dict[str, Any]) -> None:
-        """Set window mode."""
+        """Set the extra options that differ from the known ones."""
+        extra_options = self._setup.get("extra_options", {})
+        changed = {
+            key: value
+            for key, value in options.items()
+            if extra_options.get(key) != value
+        }
+        if not changed:
+            self._device.suppressed_writes += 1
+            return
         await self._session.set_node_setup(
             self._device.dev_id,
             self._node_info,
-            {"extra_options": options},
+            {"extra_options": changed},
         )
+        self._setup["extra_options"] = extra_options | changed
 
     def is_heating(self, status: dict[str, Any]) -> str:
         """Is heating."""
@@ -464,16 +875,41 @@ class SmartboxNode:
             self._node_info,
         )
 
-    async def update_samples(self) -> None:
-        """Update the samples."""
-        max_sample = 2
-        sample = await self.get_samples(
-            int(time.time() - (3600 * 3)),
-            int(time.time()),
+    def add_samples(self, samples: SamplesDict) -> None:
+        """Merge samples fetched from the cursor and move the cursor forward."""
+        by_time = {sample["t"]: sample for sample in self._samples}
+        by_time.update((sample["t"], sample) for sample in samples)
+        self._samples = [by_time[t] for t in sorted(by_time)][-2:]
+        latest = max(by_time, default=None)
+        if latest is not None and (
+            self.samples_cursor is None or latest > self.samples_cursor
+        ):
+            self.samples_cursor = latest
+
+    def start_backfill(self, period: int, *, restart: bool = False) -> None:
+        """Start a backfill of the last period seconds, unless one exists.
+
+        With restart, a finished backfill is started again.
+        """
+        if self.backfill is None or (restart and not self.backfill_pending):
+            end = int(time.time())
+            self.backfill = {"start": end - period, "end": end, "cursor": end - period}
+
+    @property
+    def backfill_pending(self) -> bool:
+        """Return whether a backfill is started and not finished."""
+        return (
+            self.backfill is not None and self.backfill["cursor"] < self.backfill["end"]
+        )
+
+    @property
+    def backfill_progress(self) -> float | None:
+        """Return the imported fraction of the backfill."""
+        if self.backfill is None:
+            return None
+        return (self.backfill["cursor"] - self.backfill["start"]) / max(
+            self.backfill["end"] - self.backfill["start"], 1
         )
-        if len(sample) >= max_sample:
-            self._samples = sample[-2:]
-            _LOGGER.debug("Updating node %s samples: %s", self.name, self._samples)
 
     async def get_samples(self, start_time: int, end_time: int) -> SamplesDict:
         """Update the samples."""
@@ -551,6 +987,271 @@ class SmartboxNode:
         return int((boost_end_datetime - today).total_seconds())
 
 
+class SamplesCoordinator:
+    """Fetch the samples of the nodes of a device on a single schedule.
+
+    Every cycle fetches the samples of each registered node once, with at most
+    max_concurrent_requests requests in flight and each request delayed by a
+    random jitter, and hands them to the node listener. Only the samples after
+    the node cursor, minus a small overlap for late data, are requested and
+    never more than the last day.
+
+    History backfills run for at most max_concurrent_backfills nodes at once,
+    one chunk at a time, going through the same request limit.
+    """
+
+    def __init__(
+        self,
+        device: SmartboxDevice,
+        hass: HomeAssistant,
+        *,
+        interval: float = DEFAULT_SAMPLES_INTERVAL,
+        jitter: float = DEFAULT_SAMPLES_JITTER,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        max_concurrent_backfills: int = DEFAULT_MAX_CONCURRENT_BACKFILLS,
+    ) -> None:
+        """Initialise the samples coordinator of a device."""
+        self._device = device
+        self._hass = hass
+        self._interval = interval
+        self._jitter = jitter
+        self._limiter = asyncio.Semaphore(max_concurrent_requests)
+        self._backfills = asyncio.Semaphore(max_concurrent_backfills)
+        self._listeners: dict[
+            SmartboxNode, Callable[[SamplesDict], Awaitable[None]]
+        ] = {}
+        self._unsub_interval: Callable[[], None] | None = None
+
+    def add_node(
+        self,
+        node: SmartboxNode,
+        listener: Callable[[SamplesDict], Awaitable[None]],
+    ) -> Callable[[], None]:
+        """Fetch the samples of node on every cycle and return the remover."""
+        self._listeners[node] = listener
+        if self._unsub_interval is None:
+            self._unsub_interval = async_track_time_interval(
+                self._hass,
+                self._async_refresh,
+                timedelta(seconds=self._interval),
+                name=f"Update samples - {self._device.dev_id}",
+                cancel_on_shutdown=True,
+            )
+
+        def _remove() -> None:
+            self._listeners.pop(node, None)
+            if not self._listeners:
+                self.cancel()
+
+        return _remove
+
+    @property
+    def nodes(self) -> list[SmartboxNode]:
+        """Return the nodes whose samples are fetched."""
+        return list(self._listeners)
+
+    def cancel(self) -> None:
+        """Stop the schedule."""
+        if self._unsub_interval is not None:
+            self._unsub_interval()
+            self._unsub_interval = None
+
+    async def _async_refresh(self, _: datetime | None = None) -> None:
+        """Fetch the samples of every registered node.
+
+        The listeners are called together once every node is fetched, so that
+        the work they share is batched per refresh despite the jitter.
+        """
+        nodes = list(self._listeners)
+        fetched = await asyncio.gather(
+            *(self._async_fetch_node(node, jitter=self._jitter) for node in nodes)
+        )
+        await asyncio.gather(
+            *(
+                self._async_notify_node(node, samples)
+                for node, samples in zip(nodes, fetched, strict=True)
+                if samples is not None
+            )
+        )
+
+    async def async_refresh_node(self, node: SmartboxNode, jitter: float = 0) -> None:
+        """Fetch the samples of a node and hand them to its listener."""
+        if (samples := await self._async_fetch_node(node, jitter)) is not None:
+            await self._async_notify_node(node, samples)
+
+    async def _async_fetch_node(
+        self, node: SmartboxNode, jitter: float = 0
+    ) -> SamplesDict | None:
+        """Fetch the samples of a node from its cursor, None if it failed."""
+        if jitter:
+            await asyncio.sleep(random.uniform(0, jitter))  # noqa: S311
+        now = int(time.time())
+        start_time = now - SAMPLES_WINDOW
+        if node.samples_cursor is not None:
+            start_time = max(start_time, node.samples_cursor - SAMPLES_CURSOR_OVERLAP)
+        try:
+            async with self._limiter:
+                samples = await node.get_samples(start_time, now + 3600)
+        except (APIUnavailableError, SmartboxError) as ex:
+            _LOGGER.warning("Unable to fetch samples of node %s: %r", node.name, ex)
+            return None
+        node.add_samples(samples)
+        self._device.notify("samples")
+        return samples
+
+    async def _async_notify_node(
+        self, node: SmartboxNode, samples: SamplesDict
+    ) -> None:
+        """Hand the fetched samples of a node to its listener."""
+        if (listener := self._listeners.get(node)) is not None:
+            try:
+                await listener(samples)
+            except Exception:
+                _LOGGER.exception("Error handling samples of node %s", node.name)
+
+    async def async_backfill_node(
+        self,
+        node: SmartboxNode,
+        import_samples: Callable[[SamplesDict], Awaitable[None]],
+    ) -> bool:
+        """Import the history of a node chunk by chunk, from its checkpoint.
+
+        The checkpoint moves after each imported chunk, so an interrupted
+        backfill resumes where it stopped. Return whether it is finished.
+        """
+        async with self._backfills:
+            while node.backfill_pending:
+                checkpoint = cast("BackfillCheckpoint", node.backfill)
+                end_time = min(checkpoint["cursor"] + BACKFILL_CHUNK, checkpoint["end"])
+                try:
+                    async with self._limiter:
+                        samples = await node.get_samples(
+                            checkpoint["cursor"], end_time + 3600
+                        )
+                except (APIUnavailableError, SmartboxError) as ex:
+                    _LOGGER.warning(
+                        "Unable to backfill the samples of node %s: %r", node.name, ex
+                    )
+                    return False
+                await import_samples(samples)
+                checkpoint["cursor"] = end_time
+                self._device.notify("samples")
+        return True
+
+
+class PowerPoller:
+    """Poll the power of the PMO nodes of an entry on a single schedule.
+
+    Every poll fetches the power of each registered node. The next poll comes
+    after interval plus a random jitter, where interval is reset to its minimum
+    as soon as a reading changes and doubled while they stay stable, up to
+    max_interval.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: float,
+        *,
+        max_interval: float | None = None,
+        jitter: float = DEFAULT_POWER_POLL_JITTER,
+    ) -> None:
+        """Initialise the power poller."""
+        self._hass = hass
+        self._min_interval = interval
+        self._backoff_factor = (
+            max_interval / interval
+            if max_interval is not None
+            else POWER_POLL_BACKOFF_FACTOR
+        )
+        self._max_interval = interval * self._backoff_factor
+        self._jitter = jitter
+        self.interval = interval
+        self._listeners: dict[SmartboxNode, Callable[[], None]] = {}
+        self._unsub_poll: Callable[[], None] | None = None
+
+    def add_node(
+        self, node: SmartboxNode, listener: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Poll the power of node, calling listener when it changes."""
+        self._listeners[node] = listener
+        if self._unsub_poll is None:
+            self._schedule()
+
+        def _remove() -> None:
+            self._listeners.pop(node, None)
+            if not self._listeners:
+                self.cancel()
+
+        return _remove
+
+    def set_interval(self, interval: float) -> None:
+        """Change the minimum interval, scheduling the next poll with it."""
+        self._min_interval = self.interval = interval
+        self._max_interval = interval * self._backoff_factor
+        if self._unsub_poll is not None:
+            self._schedule()
+
+    def cancel(self) -> None:
+        """Stop polling."""
+        self._listeners.clear()
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+
+    def _schedule(self) -> None:
+        """Schedule the next poll, replacing the scheduled one."""
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+        self._unsub_poll = async_call_later(
+            self._hass,
+            self.interval + random.uniform(0, self._jitter),  # noqa: S311
+            self._async_poll,
+        )
+
+    async def _async_poll(self, _: datetime | None = None) -> None:
+        """Poll every node and adapt the interval to the readings.
+
+        The next poll is scheduled whatever happens to this one, unless it is
+        cancelled.
+        """
+        changed: list[bool] = []
+        try:
+            changed = await asyncio.gather(
+                *(self._async_poll_node(node) for node in list(self._listeners))
+            )
+        except asyncio.CancelledError:
+            self._unsub_poll = None
+            raise
+        except Exception:
+            _LOGGER.exception("Error polling the power of the PMO nodes")
+        if any(changed):
+            self.interval = self._min_interval
+        else:
+            self.interval = min(self.interval * 2, self._max_interval)
+        if self._listeners:
+            self._schedule()
+        else:
+            self._unsub_poll = None
+
+    async def _async_poll_node(self, node: SmartboxNode) -> bool:
+        """Fetch the power of a node and return whether it changed."""
+        previous = node.status.get("power")
+        try:
+            await node.update_power()
+        except Exception as ex:  # noqa: BLE001
+            _LOGGER.warning("Unable to fetch the power of node %s: %r", node.name, ex)
+            return False
+        if node.status.get("power") == previous:
+            return False
+        if (listener := self._listeners.get(node)) is not None:
+            try:
+                listener()
+            except Exception:
+                _LOGGER.exception("Error in power listener of node %s", node.name)
+        return True
+
+
 def get_temperature_unit(status: StatusDict) -> None | UnitOfTemperature:
     """Get the unit of temperature."""
     if "units" not in status:
@@ -565,22 +1266,88 @@ def get_temperature_unit(status: StatusDict) -> None | UnitOfTemperature:
 
 
 async def get_devices(
-    session: AsyncSmartboxSession | MagicMock, hass: HomeAssistant
-) -> list[SmartboxDevice]:
-    """Get the devices."""
+    session: AsyncSmartboxSession | MagicMock,
+    hass: HomeAssistant,
+    max_concurrent_devices: int = DEFAULT_MAX_CONCURRENT_DEVICES,
+    device_timeout: float = DEFAULT_DEVICE_TIMEOUT,
+) -> tuple[list[SmartboxDevice], list[Device]]:
+    """Get the devices of every home.
+
+    Return the initialised devices and the session devices that failed.
+    """
+    return await initialise_devices(
+        await get_session_devices(session),
+        session,
+        hass,
+        max_concurrent_devices,
+        device_timeout,
+    )
+
+
+async def get_session_devices(
+    session: AsyncSmartboxSession | MagicMock,
+) -> list[Device]:
+    """Get the session devices of every home, with their home."""
     homes: list[dict[str, Any]] = cast(
         "list[dict[str, Any]]", await session.get_homes()
     )
-    devices: list[SmartboxDevice] = []
+    session_devices: list[Device] = []
     for home in homes:
         _home = home.copy()
         del _home["devs"]
         for session_device in home["devs"]:
             session_device["home"] = _home
-            devices.append(
-                await SmartboxDevice.initialise_nodes(session_device, session, hass)
-            )
-    return devices
+            session_devices.append(session_device)
+    return session_devices
+
+
+async def initialise_devices(
+    session_devices: list[Device],
+    session: AsyncSmartboxSession | MagicMock,
+    hass: HomeAssistant,
+    max_concurrent_devices: int = DEFAULT_MAX_CONCURRENT_DEVICES,
+    device_timeout: float = DEFAULT_DEVICE_TIMEOUT,
+    *,
+    restored: dict[str, SmartboxDevice] | None = None,
+) -> tuple[list[SmartboxDevice], list[Device]]:
+    """Initialise devices concurrently.
+
+    A device that fails or does not answer within device_timeout is returned
+    in the failed list instead of holding up the others. Authentication
+    errors still abort everything. Devices found in restored are reconciled
+    instead of being created again.
+    """
+    limiter = asyncio.Semaphore(max_concurrent_devices)
+    restored = restored or {}
+
+    async def _initialise(session_device: Device) -> SmartboxDevice | None:
+        async with limiter:
+            try:
+                async with asyncio.timeout(device_timeout):
+                    if (device := restored.get(session_device["dev_id"])) is not None:
+                        await device.reconcile(session_device)
+                        return device
+                    return await SmartboxDevice.initialise_nodes(
+                        session_device, session, hass
+                    )
+            except (TimeoutError, APIUnavailableError, SmartboxError) as ex:
+                _LOGGER.warning(
+                    "Unable to initialise device %s: %r",
+                    session_device["dev_id"],
+                    ex,
+                )
+                return None
+
+    results = await _gather_cancelling(
+        _initialise(session_device) for session_device in session_devices
+    )
+    devices = [device for device in results if device is not None]
+    failed = [
+        session_device
+        for session_device, device in zip(session_devices, results, strict=True)
+        if device is None
+    ]
+    return devices, failed
 
 
 def _check_status_key(key: str, node_type: str, status: dict[str, Any]) -> None:
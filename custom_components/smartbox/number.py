@@ -1,31 +1,33 @@
 """Support for Smartbox sensor entities."""
 
+import asyncio
+from functools import partial
 import logging
+from typing import Any
 
 from homeassistant.components.number import NumberDeviceClass, NumberEntity, NumberMode
 from homeassistant.const import (
-    ATTR_AREA_ID,
-    ATTR_DEVICE_ID,
-    ATTR_ENTITY_ID,
     ATTR_TEMPERATURE,
     EntityCategory,
     UnitOfPower,
     UnitOfTemperature,
     UnitOfTime,
 )
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers import (
-    config_validation as cv,
-    device_registry as dr,
-    entity_registry as er,
-)
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 import voluptuous as vol
 
 from . import SmartboxConfigEntry
 from .const import ATTR_DURATION, DEFAULT_BOOST_TIME, DOMAIN, SERVICE_SET_BOOST_PARAMS
-from .entity import SmartBoxDeviceEntity, SmartBoxNodeEntity
-from .models import get_temperature_unit
+from .entity import (
+    SmartBoxDeviceEntity,
+    SmartBoxNodeEntity,
+    async_setup_node_entities,
+    async_target_nodes,
+)
+from .models import SmartboxDevice, SmartboxNode, get_temperature_unit
 
 _LOGGER = logging.getLogger(__name__)
 _MAX_POWER_LIMIT = 9999
@@ -39,62 +41,13 @@ async def async_setup_entry(
     """Set up platform."""
     _LOGGER.debug("Setting up Smartbox number platform")
 
-    # Add power limit entities
-    async_add_entities(
-        [
-            PowerLimit(device, entry)
-            for device in entry.runtime_data.devices
-            if device.power_limit != 0
-        ],
-        update_before_add=True,
+    async_setup_node_entities(
+        hass, entry, partial(_async_add_nodes, entry, async_add_entities, set())
     )
-    # Add boost temperature and duration entities for each heater
-    boost_entities: list[ConfigBoostDuration | ConfigBoostTemperature] = []
-    boost_entities.extend(
-        [
-            ConfigBoostTemperature(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.boost_available
-        ],
-    )
-    boost_entities.extend(
-        [
-            ConfigBoostDuration(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.boost_available
-        ]
-    )
-    async_add_entities(boost_entities, update_before_add=True)
 
-    async def handle_set_boost_params(call: ServiceCall) -> None:  # pragma: no cover
+    async def handle_set_boost_params(call: ServiceCall) -> None:
         """Handle the service call."""
-        devices: list = call.data.get(ATTR_DEVICE_ID, [])
-        entities: list = call.data.get(ATTR_ENTITY_ID, [])
-        for area in call.data.get(ATTR_AREA_ID, []):
-            for device in dr.async_entries_for_area(dr.async_get(hass), area):
-                if device.id not in devices:
-                    devices.append(device.id)
-                    for entity in er.async_entries_for_device(
-                        er.async_get(hass), device.id
-                    ):
-                        if entity.id not in entities:
-                            _entity = next(
-                                (
-                                    e
-                                    for e in boost_entities
-                                    if e.entity_id == entity.entity_id
-                                ),
-                                None,
-                            )
-                            if _entity is not None:
-                                if (
-                                    boost_temp := call.data.get(ATTR_TEMPERATURE, False)
-                                ) and _entity.device_class == ATTR_TEMPERATURE:
-                                    await _entity.async_set_native_value(boost_temp)
-                                if (
-                                    boost_time := call.data.get(ATTR_DURATION, False)
-                                ) and _entity.device_class == ATTR_DURATION:
-                                    await _entity.async_set_native_value(boost_time)
+        await async_set_boost_params(hass, call)
 
     hass.services.async_register(
         DOMAIN,
@@ -114,6 +67,68 @@ async def async_setup_entry(
     _LOGGER.debug("Finished setting up Smartbox number platform")
 
 
+async def async_set_boost_params(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Set the boost parameters of the targeted nodes, concurrently.
+
+    Both parameters of a node are sent in a single extra options write. A
+    failed write does not stop the others, the nodes that failed being named in
+    the error raised once every write finished.
+    """
+    options: dict[str, Any] = {}
+    if (boost_temp := call.data.get(ATTR_TEMPERATURE)) is not None:
+        options["boost_temp"] = str(boost_temp)
+    if (boost_time := call.data.get(ATTR_DURATION)) is not None:
+        options["boost_time"] = boost_time
+    nodes = [node for node in async_target_nodes(hass, call) if node.boost_available]
+    results = await asyncio.gather(
+        *(node.set_extra_options(options) for node in nodes), return_exceptions=True
+    )
+    failed = []
+    for node, result in zip(nodes, results, strict=True):
+        if isinstance(result, Exception):
+            _LOGGER.warning(
+                "Unable to set the boost parameters of %s: %r", node.name, result
+            )
+            failed.append(node.name)
+    if failed:
+        msg = f"Unable to set the boost parameters of {', '.join(failed)}"
+        raise HomeAssistantError(msg)
+
+
+@callback
+def _async_add_nodes(
+    entry: SmartboxConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    power_limit_devices: set[str],
+    nodes: list[SmartboxNode],
+) -> None:
+    """Add the number entities of new nodes."""
+    # Add power limit entities
+    devices: dict[str, SmartboxDevice] = {
+        node.device.dev_id: node.device
+        for node in nodes
+        if node.device.dev_id not in power_limit_devices
+    }
+    power_limit_devices.update(devices)
+    async_add_entities(
+        [
+            PowerLimit(device, entry)
+            for device in devices.values()
+            if device.power_limit != 0
+        ],
+        update_before_add=True,
+    )
+    # Add boost temperature and duration entities for each heater
+    boost_nodes = [node for node in nodes if node.boost_available]
+    async_add_entities(
+        [
+            *(ConfigBoostTemperature(node, entry) for node in boost_nodes),
+            *(ConfigBoostDuration(node, entry) for node in boost_nodes),
+        ],
+        update_before_add=True,
+    )
+
+
 class PowerLimit(SmartBoxDeviceEntity, NumberEntity):
     """Smartbox device power limit."""
 
@@ -1,9 +1,12 @@
 """Support for Smartbox sensor entities."""
 
-from datetime import datetime, timedelta
+import asyncio
+from datetime import UTC, datetime, timedelta, tzinfo
+from functools import partial
+from itertools import pairwise
 import logging
 import math
-import time
+from typing import Any
 from unittest.mock import MagicMock
 
 from dateutil import tz
@@ -14,9 +17,12 @@ from homeassistant.components.recorder.models.statistics import (
     StatisticMetaData,
 )
 from homeassistant.components.recorder.statistics import (
+    StatisticsRow,
     async_import_statistics,
-    get_last_short_term_statistics,
+    get_last_statistics,
+    get_latest_short_term_statistics_with_session,
 )
+from homeassistant.components.recorder.util import session_scope
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
@@ -30,90 +36,127 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfTemperature,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.util import dt
 
 from . import SmartboxConfigEntry
 from .const import (
+    ATTR_POLL_INTERVAL,
+    BACKFILL_PERIOD,
+    BACKFILL_RETRY_INTERVAL,
+    BACKFILL_RETRY_MAX_INTERVAL,
     CONF_HISTORY_CONSUMPTION,
     CONF_TIMEDELTA_POWER,
     DEFAULT_TIMEDELTA_POWER,
+    DOMAIN,
     HistoryConsumptionStatus,
     SmartboxNodeType,
 )
-from .entity import SmartBoxNodeEntity
-from .models import SmartboxNode, get_temperature_unit
+from .entity import SmartBoxNodeEntity, async_setup_node_entities
+from .models import PowerPoller, SamplesDict, SmartboxNode, get_temperature_unit
 
 _LOGGER = logging.getLogger(__name__)
-SCAN_INTERVAL = timedelta(minutes=15)
+# longest span assumed to hold at most one UTC offset change
+OFFSET_SEGMENT = 7 * 24 * 3600
 
 
 async def async_setup_entry(
-    _: HomeAssistant,
+    hass: HomeAssistant,
     entry: SmartboxConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up platform."""
     _LOGGER.debug("Setting up Smartbox sensor platform")
-    # Temperature
-    async_add_entities(
-        [
-            TemperatureSensor(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.heater_node
-        ],
-        update_before_add=True,
-    )
-    # Power
-    async_add_entities(
-        [
-            PowerSensor(node, entry)
-            for node in entry.runtime_data.nodes
-            # if is_heater_node(node) and node.node_type != SmartboxNodeType.HTR_MOD
-        ],
-        update_before_add=True,
-    )
-    # Duty Cycle and Energy
-    # Only nodes of type 'htr' seem to report the duty cycle, which is needed
-    # to compute energy consumption
-    async_add_entities(
-        [
-            DutyCycleSensor(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.node_type == SmartboxNodeType.HTR
-        ],
-        update_before_add=True,
-    )
-    async_add_entities(
-        [TotalConsumptionSensor(node, entry) for node in entry.runtime_data.nodes],
-        update_before_add=True,
+    short_term_statistics = ShortTermStatistics()
+    power_poller = PowerPoller(
+        hass, entry.options.get(CONF_TIMEDELTA_POWER, DEFAULT_TIMEDELTA_POWER)
     )
+    entry.async_on_unload(power_poller.cancel)
 
-    # Charge Level
-    async_add_entities(
-        [
-            ChargeLevelSensor(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.heater_node and node.node_type == SmartboxNodeType.ACM
-        ],
-        update_before_add=True,
-    )
-    async_add_entities(
-        [
-            BoostEndTimeSensor(node, entry)
-            for node in entry.runtime_data.nodes
-            if node.boost_available
-        ],
-        update_before_add=True,
-    )
+    @callback
+    def _async_options_updated(changed: set[str]) -> None:
+        if CONF_TIMEDELTA_POWER in changed:
+            power_poller.set_interval(
+                entry.options.get(CONF_TIMEDELTA_POWER, DEFAULT_TIMEDELTA_POWER)
+            )
+        # as on setup, every backfill is started before the sensors import them,
+        # the finished ones being imported again
+        if (
+            CONF_HISTORY_CONSUMPTION in changed
+            and entry.options.get(CONF_HISTORY_CONSUMPTION)
+            == HistoryConsumptionStatus.START
+        ):
+            for node in entry.runtime_data.nodes:
+                node.start_backfill(BACKFILL_PERIOD, restart=True)
+
+    @callback
+    def _async_add_nodes(nodes: list[SmartboxNode]) -> None:
+        # Temperature
+        async_add_entities(
+            [TemperatureSensor(node, entry) for node in nodes if node.heater_node],
+            update_before_add=True,
+        )
+        # Power
+        async_add_entities(
+            [
+                PowerSensor(node, entry, power_poller)
+                for node in nodes
+                # if is_heater_node(node) and node.node_type != SmartboxNodeType.HTR_MOD
+            ],
+            update_before_add=True,
+        )
+        # Duty Cycle and Energy
+        # Only nodes of type 'htr' seem to report the duty cycle, which is needed
+        # to compute energy consumption
+        async_add_entities(
+            [
+                DutyCycleSensor(node, entry)
+                for node in nodes
+                if node.node_type == SmartboxNodeType.HTR
+            ],
+            update_before_add=True,
+        )
+        # Samples are loaded once the sensor is added, so disabled consumption
+        # sensors never fetch them. The history backfill of every node is
+        # started upfront so that the mode only turns to auto once the nodes
+        # of all the added sensors are imported.
+        if (
+            entry.options.get(CONF_HISTORY_CONSUMPTION, HistoryConsumptionStatus.START)
+            == HistoryConsumptionStatus.START
+        ):
+            for node in nodes:
+                node.start_backfill(BACKFILL_PERIOD)
+        async_add_entities(
+            [
+                TotalConsumptionSensor(node, entry, short_term_statistics)
+                for node in nodes
+            ]
+        )
+
+        # Charge Level
+        async_add_entities(
+            [
+                ChargeLevelSensor(node, entry)
+                for node in nodes
+                if node.heater_node and node.node_type == SmartboxNodeType.ACM
+            ],
+            update_before_add=True,
+        )
+        async_add_entities(
+            [BoostEndTimeSensor(node, entry) for node in nodes if node.boost_available],
+            update_before_add=True,
+        )
+
+    async_setup_node_entities(hass, entry, _async_add_nodes, _async_options_updated)
     _LOGGER.debug("Finished setting up Smartbox sensor platform")
 
 
 class SmartboxSensorBase(SmartBoxNodeEntity, SensorEntity):
     """Base class for Smartbox sensor."""
 
+    _attr_status_fields = frozenset({"locked"})
+
     def __init__(
         self,
         node: SmartboxNode | MagicMock,
@@ -121,7 +164,6 @@ class SmartboxSensorBase(SmartBoxNodeEntity, SensorEntity):
     ) -> None:
         """Initialize the Climate Entity."""
         super().__init__(node=node, entry=entry)
-        self.config_entry = entry
         self._attr_websocket_event = "status"
         _LOGGER.debug("Created node unique_id=%s", self.unique_id)
 
@@ -142,6 +184,7 @@ class TemperatureSensor(SmartboxSensorBase):
     """Smartbox heater temperature sensor."""
 
     _attr_key = "temperature"
+    _attr_status_fields = frozenset({"locked", "mtemp", "units"})
     device_class = SensorDeviceClass.TEMPERATURE
     state_class = SensorStateClass.MEASUREMENT
 
@@ -167,35 +210,43 @@ class PowerSensor(SmartboxSensorBase):
     """
 
     _attr_key = "power"
+    _attr_status_fields = frozenset({"active", "charging", "locked", "power"})
     device_class = SensorDeviceClass.POWER
     native_unit_of_measurement = UnitOfPower.WATT
     state_class = SensorStateClass.MEASUREMENT
     entity_category = EntityCategory.DIAGNOSTIC
 
+    def __init__(
+        self,
+        node: SmartboxNode | MagicMock,
+        entry: SmartboxConfigEntry,
+        power_poller: PowerPoller | MagicMock,
+    ) -> None:
+        """Initialize the sensor, polled by the power poller of the entry."""
+        super().__init__(node, entry)
+        self._power_poller = power_poller
+
     async def async_added_to_hass(self) -> None:
         """When added to hass."""
         await super().async_added_to_hass()
         if self._node.node_type == SmartboxNodeType.PMO:
-            self._attr_should_poll = True
             self.async_on_remove(
-                async_track_time_interval(
-                    self.hass,
-                    self._async_update_pmo,
-                    timedelta(
-                        seconds=self.config_entry.options.get(
-                            CONF_TIMEDELTA_POWER, DEFAULT_TIMEDELTA_POWER
-                        )
-                    ),
-                    name=f"Update PMO Power - {self.name}",
-                    cancel_on_shutdown=True,
-                )
+                self._power_poller.add_node(self._node, self._async_power_updated)
             )
 
-    async def _async_update_pmo(self, _) -> None:  # noqa: ANN001
-        """Get the latest data."""
+    @callback
+    def _async_power_updated(self) -> None:
+        """Write the polled power of the PMO node."""
+        self._status = self._node.status
+        self.async_write_ha_state()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return extra states of the sensor, with the PMO poll interval."""
+        attributes: dict[str, Any] = dict(super().extra_state_attributes)
         if self._node.node_type == SmartboxNodeType.PMO:
-            await self._node.update_power()
-            self.async_write_ha_state()
+            attributes[ATTR_POLL_INTERVAL] = self._power_poller.interval
+        return attributes
 
     @property
     def native_value(self) -> float:
@@ -214,6 +265,7 @@ class DutyCycleSensor(SmartboxSensorBase):
     """Smartbox heater duty cycle sensor: Represents the duty cycle for the heater."""
 
     _attr_key = "duty_cycle"
+    _attr_status_fields = frozenset({"duty", "locked"})
     device_class = SensorDeviceClass.POWER_FACTOR
     native_unit_of_measurement = PERCENTAGE
     state_class = SensorStateClass.MEASUREMENT
@@ -231,7 +283,20 @@ class TotalConsumptionSensor(SmartboxSensorBase):
     device_class = SensorDeviceClass.ENERGY
     native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
     state_class = SensorStateClass.TOTAL_INCREASING
-    _attr_should_poll = True
+    # start timestamp of the last imported hour, seeded from the recorder
+    _last_imported_hour: float | None = None
+    _last_imported_hour_seeded = False
+    _backfill_task: asyncio.Task | None = None
+
+    def __init__(
+        self,
+        node: SmartboxNode | MagicMock,
+        entry: SmartboxConfigEntry,
+        short_term_statistics: "ShortTermStatistics | None" = None,
+    ) -> None:
+        """Initialize the sensor, sharing the short term statistics of the entry."""
+        super().__init__(node, entry)
+        self._short_term_statistics = short_term_statistics or ShortTermStatistics()
 
     @property
     def native_value(self) -> float | None:
@@ -240,70 +305,131 @@ class TotalConsumptionSensor(SmartboxSensorBase):
 
     async def async_update(self) -> None:
         """Get the latest data."""
-        await self._node.update_samples()
-        await self._adjust_short_term_statistics()
+        await self._node.device.samples_coordinator.async_refresh_node(self._node)
 
     async def async_added_to_hass(self) -> None:
         """When added to hass."""
-        # perform initial statistics import when sensor is added, otherwise it would take
-        # 1 day when _handle_coordinator_update is triggered for the first time.
+        # The samples of the device nodes are fetched on a single schedule, the
+        # first fetch of this node is started now in the background to load its
+        # samples and import the statistics of the last day, without holding up
+        # the setup. The history is imported in the background too, resuming
+        # from its checkpoint.
         self._available = True
-        await self.update_statistics()
-        await self._adjust_short_term_statistics()
+        self._async_start_backfill()
         await super().async_added_to_hass()
+        samples_coordinator = self._node.device.samples_coordinator
         self.async_on_remove(
-            async_track_time_interval(
-                self.hass,
-                self.update_statistics,
-                timedelta(minutes=15),
-                name=f"Update statistics - {self.name}",
-                cancel_on_shutdown=True,
-            )
+            samples_coordinator.add_node(self._node, self._async_samples_updated)
         )
-
-    async def _adjust_short_term_statistics(self) -> None:
-        """Adjust the short term statistics for the sensor."""
-        if last_stat := await get_instance(self.hass).async_add_executor_job(
-            get_last_short_term_statistics,
+        self.config_entry.async_create_background_task(
             self.hass,
-            1,
-            self.entity_id,
-            True,  # noqa: FBT003
-            {"sum", "state"},
+            samples_coordinator.async_refresh_node(self._node),
+            f"{DOMAIN}_{self._node.node_id}_samples",
+        )
+
+    @callback
+    def _async_start_backfill(self) -> None:
+        """Import the pending history in the background, unless already doing so."""
+        if (
+            self._history_status != HistoryConsumptionStatus.OFF
+            and self._node.backfill_pending
+            and (self._backfill_task is None or self._backfill_task.done())
         ):
-            state_value = last_stat[self.entity_id][0]["state"]
-            sum_value = last_stat[self.entity_id][0]["sum"]
-            if (
-                state_value is not None
-                and sum_value is not None
-                and (sum_value != state_value)
-            ):
-                get_instance(self.hass).async_adjust_statistics(
-                    statistic_id=self.entity_id,
-                    start_time=datetime.fromtimestamp(
-                        last_stat[self.entity_id][0]["start"], tz.tzlocal()
-                    ),
-                    sum_adjustment=state_value - sum_value,
-                    adjustment_unit=self.native_unit_of_measurement,
-                )
+            self._backfill_task = self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_backfill(),
+                f"{DOMAIN}_{self._node.node_id}_backfill",
+            )
+
+    @callback
+    def async_options_updated(self, changed: set[str]) -> None:
+        """Apply the changed options, starting or stopping the history import."""
+        super().async_options_updated(changed)
+        if CONF_HISTORY_CONSUMPTION not in changed:
+            return
+        if self._history_status == HistoryConsumptionStatus.OFF:
+            if self._backfill_task is not None:
+                self._backfill_task.cancel()
+            return
+        # in START, the backfill was started by the platform
+        self._async_start_backfill()
+
+    async def _async_samples_updated(self, samples: SamplesDict) -> None:
+        """Import the statistics and update the state from fetched samples.
+
+        The new hours are imported while the history is backfilled too, so
+        that none is missed between the end of the backfill and the cursor.
+        The short term statistics lookup is requested before anything else,
+        for the lookups of the sensors of a refresh to go in one query.
+        """
+        last_stat_lookup = self._short_term_statistics.async_get_last(
+            self.hass, self.entity_id, self.native_value
+        )
+        try:
+            if self._history_status != HistoryConsumptionStatus.OFF:
+                await self._async_import_statistics(samples, only_new=True)
+        except BaseException:
+            last_stat_lookup.cancel()
+            raise
+        await self._adjust_short_term_statistics(last_stat_lookup)
+        self.async_write_ha_state()
 
-    async def update_statistics(self, *args, **kwargs) -> None:  # noqa: ANN002, ANN003, ARG002
-        """Update statistics from samples."""
-        history_status = HistoryConsumptionStatus(
+    @property
+    def _history_status(self) -> HistoryConsumptionStatus:
+        """Return how the consumption history is imported."""
+        return HistoryConsumptionStatus(
             self.config_entry.options.get(
                 CONF_HISTORY_CONSUMPTION, HistoryConsumptionStatus.START
             )
         )
-        statistic_id = f"{self.entity_id}"
-        samples_data = []
-        if history_status == HistoryConsumptionStatus.START:
-            # last 3 years
-            for year in (3, 2, 1):
-                year_sample = await self._node.get_samples(
-                    int(time.time() - (year * 365 * 24 * 60 * 60)),
-                    int(time.time() - ((year - 1) * 365 * 24 * 60 * 60 - 3600)),
-                )
-                samples_data.extend(year_sample)
+
+    async def _adjust_short_term_statistics(
+        self, last_stat_lookup: "asyncio.Future[StatisticsRow | None] | None" = None
+    ) -> None:
+        """Adjust the short term statistics for the sensor."""
+        if last_stat_lookup is None:
+            last_stat_lookup = self._short_term_statistics.async_get_last(
+                self.hass, self.entity_id, self.native_value
+            )
+        if (last_stat := await last_stat_lookup) is None:
+            return
+        state_value = last_stat["state"]
+        sum_value = last_stat["sum"]
+        if (
+            state_value is not None
+            and sum_value is not None
+            and sum_value != state_value
+        ):
+            get_instance(self.hass).async_adjust_statistics(
+                statistic_id=self.entity_id,
+                start_time=datetime.fromtimestamp(last_stat["start"], tz.tzlocal()),
+                sum_adjustment=state_value - sum_value,
+                adjustment_unit=self.native_unit_of_measurement,
+            )
+            self._short_term_statistics.set_adjusted(self.entity_id)
+
+    async def _async_backfill(self) -> None:
+        """Import the history of the node and switch to auto once all are done.
+
+        A failed chunk is retried, backing off between attempts. Only the nodes
+        whose consumption sensor is added are waited for, as the backfill of
+        the others never runs.
+        """
+        samples_coordinator = self._node.device.samples_coordinator
+        delay = BACKFILL_RETRY_INTERVAL
+        while not await samples_coordinator.async_backfill_node(
+            self._node, self._async_import_statistics
+        ):
+            _LOGGER.debug(
+                "Retrying the backfill of node %s in %s s", self._node.name, delay
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, BACKFILL_RETRY_MAX_INTERVAL)
+        if self._history_status == HistoryConsumptionStatus.START and not any(
+            node.backfill_pending
+            for device in self.config_entry.runtime_data.devices
+            for node in device.samples_coordinator.nodes
+        ):
             self.hass.config_entries.async_update_entry(
                 entry=self.config_entry,
                 options={
@@ -311,25 +437,49 @@ class TotalConsumptionSensor(SmartboxSensorBase):
                     CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
                 },
             )
-        elif history_status == HistoryConsumptionStatus.AUTO:
-            # last day
-            samples_data = await self._node.get_samples(
-                int(time.time() - (24 * 60 * 60)),
-                int(time.time() + 3600),
-            )
 
-        samples_data = sorted(samples_data, key=lambda x: x["t"])
-        statistics: list[StatisticData] = []
-        for entry in samples_data:
-            counter = float(entry["counter"])
-            start = datetime.fromtimestamp(entry["t"], tz.tzlocal()) - timedelta(
-                hours=1
-            )
-            if start.minute == 0:
-                statistics.append(
-                    StatisticData(start=start, sum=counter, state=counter)
-                )
-        if statistics and history_status != HistoryConsumptionStatus.OFF:
+    async def _async_seed_last_imported_hour(self) -> None:
+        """Load the last imported hour from the recorder, once."""
+        if self._last_imported_hour_seeded:
+            return
+        if last_stat := await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics,
+            self.hass,
+            1,
+            self.entity_id,
+            True,  # noqa: FBT003
+            {"sum"},
+        ):
+            last_start = last_stat[self.entity_id][0]["start"]
+            if (
+                self._last_imported_hour is None
+                or last_start > self._last_imported_hour
+            ):
+                self._last_imported_hour = last_start
+        self._last_imported_hour_seeded = True
+
+    async def _async_import_statistics(
+        self, samples_data: SamplesDict, *, only_new: bool = False
+    ) -> None:
+        """Import the hourly statistics of the samples.
+
+        The statistics are computed in the executor, as a backfill chunk can
+        hold thousands of samples. With only_new, the hours up to the last
+        imported one are skipped.
+        """
+        statistic_id = f"{self.entity_id}"
+        statistics = await self.hass.async_add_executor_job(
+            samples_to_statistics, samples_data
+        )
+        if only_new:
+            await self._async_seed_last_imported_hour()
+            if (last_imported_hour := self._last_imported_hour) is not None:
+                statistics = [
+                    statistic
+                    for statistic in statistics
+                    if statistic["start"].timestamp() > last_imported_hour
+                ]
+        if statistics:
             metadata: StatisticMetaData = StatisticMetaData(
                 mean_type=StatisticMeanType.NONE,
                 unit_class=None,
@@ -341,12 +491,162 @@ class TotalConsumptionSensor(SmartboxSensorBase):
             )
             _LOGGER.debug("Insert statistics: %s %s", metadata, statistics)
             async_import_statistics(self.hass, metadata, statistics)
+            self._short_term_statistics.invalidate(statistic_id)
+            last_start = statistics[-1]["start"].timestamp()
+            if (
+                self._last_imported_hour is None
+                or last_start > self._last_imported_hour
+            ):
+                self._last_imported_hour = last_start
+
+
+class ShortTermStatistics:
+    """Last short term statistics of the consumption sensors of an entry.
+
+    The lookups requested in the same loop iteration go to the recorder in one
+    query. The samples coordinator hands the samples of a refresh to all the
+    sensors of a device at once, and the sensors request their lookup first,
+    so the lookups of a refresh are batched. The rows are kept in memory and
+    the recorder is only queried again once new statistics of the sensor are
+    imported, when the counter went backwards, or for a new sensor.
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty cache."""
+        self._rows: dict[str, StatisticsRow] = {}
+        self._pending: dict[str, asyncio.Future[StatisticsRow | None]] = {}
+
+    @callback
+    def async_get_last(
+        self, hass: HomeAssistant, statistic_id: str, state: float | None
+    ) -> asyncio.Future[StatisticsRow | None]:
+        """Return the future last short term statistic of statistic_id."""
+        row = self._rows.get(statistic_id)
+        if row is not None and (
+            state is None or row["state"] is None or float(state) >= row["state"]
+        ):
+            future = hass.loop.create_future()
+            future.set_result(row)
+            return future
+        if (future := self._pending.get(statistic_id)) is None:
+            if not self._pending:
+                hass.loop.call_soon(partial(self._async_lookup, hass))
+            future = self._pending[statistic_id] = hass.loop.create_future()
+        return future
+
+    def invalidate(self, statistic_id: str) -> None:
+        """Forget the row of statistic_id, for the next lookup to query it."""
+        self._rows.pop(statistic_id, None)
+
+    def set_adjusted(self, statistic_id: str) -> None:
+        """Record that the sum of statistic_id was aligned with its state."""
+        if (row := self._rows.get(statistic_id)) is not None:
+            self._rows[statistic_id] = {**row, "sum": row["state"]}
+
+    @callback
+    def _async_lookup(self, hass: HomeAssistant) -> None:
+        """Query the pending statistic ids in the background."""
+        pending, self._pending = self._pending, {}
+        hass.async_create_background_task(
+            self._async_fetch(hass, pending), "smartbox short term statistics"
+        )
+
+    async def _async_fetch(
+        self,
+        hass: HomeAssistant,
+        pending: dict[str, asyncio.Future[StatisticsRow | None]],
+    ) -> None:
+        """Fetch the last short term statistics of the pending ids."""
+        try:
+            last_stats = await get_instance(hass).async_add_executor_job(
+                _get_last_short_term_statistics, hass, set(pending)
+            )
+        except Exception as ex:  # noqa: BLE001
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(ex)
+            return
+        for statistic_id, future in pending.items():
+            row = None
+            if rows := last_stats.get(statistic_id):
+                row = self._rows[statistic_id] = rows[0]
+            if not future.done():
+                future.set_result(row)
+
+
+def _get_last_short_term_statistics(
+    hass: HomeAssistant, statistic_ids: set[str]
+) -> dict[str, list[StatisticsRow]]:
+    """Return the last short term statistic of every statistic id."""
+    with session_scope(hass=hass, read_only=True) as session:
+        return get_latest_short_term_statistics_with_session(
+            hass, session, statistic_ids, {"state", "sum"}
+        )
+
+
+def samples_to_statistics(samples_data: SamplesDict) -> list[StatisticData]:
+    """Return the statistics of the samples taken on the local hour.
+
+    The samples are sorted by time when they are not already, and only the
+    first sample of a duplicated time is kept. Hours are aligned with epoch
+    arithmetic and the UTC offset is only looked up once per DST segment.
+    """
+    if any(previous["t"] > entry["t"] for previous, entry in pairwise(samples_data)):
+        samples_data = sorted(samples_data, key=lambda x: x["t"])
+    local_tz = tz.tzlocal()
+    statistics: list[StatisticData] = []
+    last_time: float | None = None
+    segment_end: float | None = None
+    offset = 0
+    duplicates = 0
+    for entry in samples_data:
+        sample_time = entry["t"]
+        if sample_time == last_time:
+            duplicates += 1
+            continue
+        last_time = sample_time
+        if segment_end is None or sample_time >= segment_end:
+            offset, segment_end = _offset_segment(local_tz, sample_time)
+        if (sample_time + offset) % 3600 // 60 == 0:
+            counter = float(entry["counter"])
+            statistics.append(
+                StatisticData(
+                    start=datetime.fromtimestamp(sample_time - 3600, UTC),
+                    sum=counter,
+                    state=counter,
+                )
+            )
+    if duplicates:
+        _LOGGER.debug("Dropped %s samples of duplicated times", duplicates)
+    return statistics
+
+
+def _utc_offset(local_tz: tzinfo, timestamp: float) -> int:
+    """Return the UTC offset of the time zone at timestamp, in seconds."""
+    offset = datetime.fromtimestamp(timestamp, local_tz).utcoffset()
+    return int(offset.total_seconds()) if offset is not None else 0
+
+
+def _offset_segment(local_tz: tzinfo, start: float) -> tuple[int, float]:
+    """Return the UTC offset at start and the end of the span sharing it."""
+    offset = _utc_offset(local_tz, start)
+    end = start + OFFSET_SEGMENT
+    if _utc_offset(local_tz, end) != offset:
+        # bisect the offset change, to the second
+        while end - start > 1:
+            middle = (start + end) // 2
+            if _utc_offset(local_tz, middle) == offset:
+                start = middle
+            else:
+                end = middle
+    return offset, end
 
 
 class ChargeLevelSensor(SmartboxSensorBase):
     """Smartbox storage heater charge level sensor."""
 
     _attr_key = "charge_level"
+    _attr_status_fields = frozenset({"charge_level", "current_charge_per", "locked"})
     device_class = SensorDeviceClass.BATTERY
     native_unit_of_measurement = PERCENTAGE
     state_class = SensorStateClass.MEASUREMENT
@@ -367,6 +667,7 @@ class BoostEndTimeSensor(SmartboxSensorBase):
     """Smartbox end boost time sensor."""
 
     _attr_key = "boost_end_time"
+    _attr_status_fields = frozenset({"boost", "boost_end_min", "locked"})
     device_class = SensorDeviceClass.TIMESTAMP
 
     @property
@@ -4,47 +4,51 @@ import logging
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.const import EntityCategory
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import SmartboxConfigEntry
-from .entity import SmartBoxNodeEntity
-from .models import true_radiant_available, window_mode_available
+from .entity import SmartBoxNodeEntity, async_setup_node_entities
+from .models import SmartboxNode, true_radiant_available, window_mode_available
 
 _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup_entry(
-    _: HomeAssistant,
+    hass: HomeAssistant,
     entry: SmartboxConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:  # pylint: disable=unused-argument
     """Set up platform."""
     _LOGGER.debug("Setting up Smartbox switch platform")
 
-    switch_entities: list[SwitchEntity] = []
-    for node in entry.runtime_data.nodes:
-        if window_mode_available(node):
-            _LOGGER.debug("Creating window_mode switch for node %s", node.name)
-            switch_entities.append(WindowModeSwitch(node, entry))
-        else:
-            _LOGGER.info("Window mode not available for node %s", node.name)
-        if true_radiant_available(node):
-            _LOGGER.debug("Creating true_radiant switch for node %s", node.name)
-            switch_entities.append(TrueRadiantSwitch(node, entry))
-        else:
-            _LOGGER.info("True radiant not available for node %s", node.name)
-        _LOGGER.debug("Creating away switch for node %s", node.name)
-        switch_entities.append(AwaySwitch(node, entry))
-
-        if node.boost_available:
-            _LOGGER.debug("Creating boost switch for node %s", node.name)
-            boost_switch = BoostSwitch(node, entry)
-            switch_entities.append(boost_switch)
-        else:
-            _LOGGER.info("Boost mode not available for node %s", node.name)
-
-    async_add_entities(switch_entities, update_before_add=True)
+    @callback
+    def _async_add_nodes(nodes: list[SmartboxNode]) -> None:
+        switch_entities: list[SwitchEntity] = []
+        for node in nodes:
+            if window_mode_available(node):
+                _LOGGER.debug("Creating window_mode switch for node %s", node.name)
+                switch_entities.append(WindowModeSwitch(node, entry))
+            else:
+                _LOGGER.info("Window mode not available for node %s", node.name)
+            if true_radiant_available(node):
+                _LOGGER.debug("Creating true_radiant switch for node %s", node.name)
+                switch_entities.append(TrueRadiantSwitch(node, entry))
+            else:
+                _LOGGER.info("True radiant not available for node %s", node.name)
+            _LOGGER.debug("Creating away switch for node %s", node.name)
+            switch_entities.append(AwaySwitch(node, entry))
+
+            if node.boost_available:
+                _LOGGER.debug("Creating boost switch for node %s", node.name)
+                boost_switch = BoostSwitch(node, entry)
+                switch_entities.append(boost_switch)
+            else:
+                _LOGGER.info("Boost mode not available for node %s", node.name)
+
+        async_add_entities(switch_entities, update_before_add=True)
+
+    async_setup_node_entities(hass, entry, _async_add_nodes)
 
     _LOGGER.debug("Finished setting up Smartbox switch platform")
 
@@ -127,6 +131,7 @@ class BoostSwitch(SmartBoxNodeEntity, SwitchEntity):
 
     _attr_key = "boost"
     _attr_websocket_event = "status"
+    _attr_status_fields = frozenset({"boost", "boost_end_min"})
     _attr_icon = "mdi:rocket-launch"
 
     @property
@@ -0,0 +1,74 @@
+"""Benchmark the sample to hourly statistics converter.
+
+Compares samples_to_statistics with the previous per-sample loop on three
+years of samples of a node, for a few sample periods and time zones.
+
+Run from the repository root with
+``PYTHONPATH=. python scripts/benchmark_samples_converter.py``.
+"""
+# ruff: noqa: INP001
+
+from datetime import datetime, timedelta
+from functools import partial
+import timeit
+from unittest.mock import patch
+
+from dateutil import tz
+from homeassistant.components.recorder.models.statistics import StatisticData
+
+from custom_components.smartbox.const import BACKFILL_PERIOD
+from custom_components.smartbox.models import SamplesDict
+from custom_components.smartbox.sensor import samples_to_statistics
+
+TIME_ZONES = ["UTC", "Europe/Madrid", "Asia/Kolkata"]
+SAMPLE_PERIODS = [3600, 900]
+REPEAT = 3
+
+
+def legacy_samples_to_statistics(samples_data: SamplesDict) -> list[StatisticData]:
+    """Convert the samples one at a time, as update_statistics used to."""
+    statistics: list[StatisticData] = []
+    for entry in sorted(samples_data, key=lambda x: x["t"]):
+        counter = float(entry["counter"])
+        start = datetime.fromtimestamp(entry["t"], tz.tzlocal()) - timedelta(hours=1)
+        if start.minute == 0:
+            statistics.append(StatisticData(start=start, sum=counter, state=counter))
+    return statistics
+
+
+def main() -> None:
+    """Run the benchmark."""
+    end = 1739966400
+    for time_zone in TIME_ZONES:
+        local_tz = tz.gettz(time_zone)
+        for period in SAMPLE_PERIODS:
+            samples = [
+                {"t": t, "counter": t // 36}
+                for t in range(end - BACKFILL_PERIOD, end, period)
+            ]
+            with patch(
+                "custom_components.smartbox.sensor.tz.tzlocal", return_value=local_tz
+            ):
+                results = {
+                    name: min(
+                        timeit.repeat(
+                            partial(convert, samples),
+                            number=1,
+                            repeat=REPEAT,
+                        )
+                    )
+                    for name, convert in (
+                        ("legacy", legacy_samples_to_statistics),
+                        ("batch", samples_to_statistics),
+                    )
+                }
+            print(  # noqa: T201
+                f"{time_zone:>13} {len(samples):>6} samples: "
+                f"legacy {results['legacy'] * 1000:7.1f}ms, "
+                f"batch {results['batch'] * 1000:7.1f}ms, "
+                f"x{results['legacy'] / results['batch']:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark how long the history import blocks the event loop.
+
+Converts three years of hourly samples for 50 nodes to statistics, one
+backfill chunk at a time, either on the event loop or in the executor, and
+reports how long the loop was kept from running other callbacks.
+
+Run from the repository root with
+``PYTHONPATH=. python scripts/benchmark_statistics.py``.
+"""
+# ruff: noqa: INP001
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import time
+
+from custom_components.smartbox.const import BACKFILL_CHUNK, BACKFILL_PERIOD
+from custom_components.smartbox.models import SamplesDict
+from custom_components.smartbox.sensor import samples_to_statistics
+
+NODES = 50
+HEARTBEAT = 0.001
+
+
+def _chunks() -> list[SamplesDict]:
+    """Return the hourly samples of a node, split in backfill chunks."""
+    end = int(time.time()) // 3600 * 3600
+    start = end - BACKFILL_PERIOD
+    return [
+        [
+            {"t": t, "counter": (t - start) // 36}
+            for t in range(chunk, min(chunk + BACKFILL_CHUNK, end), 3600)
+        ]
+        for chunk in range(start, end, BACKFILL_CHUNK)
+    ]
+
+
+async def _monitor(stop: asyncio.Event, blocks: list[float]) -> None:
+    """Record every delay of the heartbeat beyond its interval."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        before = loop.time()
+        await asyncio.sleep(HEARTBEAT)
+        if (late := loop.time() - before - HEARTBEAT) > HEARTBEAT:
+            blocks.append(late)
+
+
+async def _run(
+    name: str,
+    chunks: list[SamplesDict],
+    convert: Callable[[SamplesDict], Awaitable[None]],
+) -> None:
+    """Import the chunks of every node and report the loop blocking."""
+    stop = asyncio.Event()
+    blocks: list[float] = []
+    monitor = asyncio.create_task(_monitor(stop, blocks))
+    await asyncio.sleep(HEARTBEAT * 5)
+
+    async def _node() -> None:
+        for chunk in chunks:
+            await convert(chunk)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_node() for _ in range(NODES)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    print(  # noqa: T201
+        f"{name:>9}: {elapsed:6.2f}s total, loop blocked {sum(blocks):6.2f}s, "
+        f"longest block {max(blocks, default=0) * 1000:7.1f}ms"
+    )
+
+
+async def _inline(chunk: SamplesDict) -> None:
+    """Convert a chunk on the event loop, as before."""
+    samples_to_statistics(chunk)
+    await asyncio.sleep(0)
+
+
+async def _executor(chunk: SamplesDict) -> None:
+    """Convert a chunk in the executor, as the sensor does."""
+    await asyncio.get_running_loop().run_in_executor(None, samples_to_statistics, chunk)
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    chunks = _chunks()
+    print(  # noqa: T201
+        f"{NODES} nodes, {sum(map(len, chunks))} samples each in {len(chunks)} chunks"
+    )
+    await _run("loop", chunks, _inline)
+    await _run("executor", chunks, _executor)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -50,6 +50,16 @@ def skip_notifications_fixture():
         yield
 
 
+@pytest.fixture(autouse=True)
+def no_write_window():
+    """Send status writes straight away.
+
+    The tests check the entity states right after a service call.
+    """
+    with patch("custom_components.smartbox.models.DEFAULT_WRITE_WINDOW", 0):
+        yield
+
+
 def _get_node_status(units: str) -> dict[str, Any]:
     data = deepcopy(MOCK_SMARTBOX_NODE_STATUS)
     if units == "F":
@@ -127,6 +137,29 @@ def mock_smartbox_unavailable(request):
         yield mock_smartbox
 
 
+@pytest.fixture
+def mock_smartbox_latency():
+    """Mock smartbox whose API reads each take a simulated round trip."""
+    mock_smartbox = MockSmartbox(
+        mock_config=MOCK_SMARTBOX_CONFIG,
+        mock_home_info=MOCK_SMARTBOX_HOME_INFO,
+        mock_device_info=MOCK_SMARTBOX_DEVICE_INFO,
+        mock_node_info=MOCK_SMARTBOX_NODE_INFO,
+        mock_node_setup=deepcopy(MOCK_SMARTBOX_NODE_SETUP),
+        mock_node_away=MOCK_SMARTBOX_NODE_AWAY,
+        mock_device_power=MOCK_SMARTBOX_DEVICE_POWER,
+        mock_node_status=_get_node_status("C"),
+        latency=0.02,
+    )
+
+    with patch(
+        "smartbox.update_manager.SocketSession",
+        autospec=True,
+        side_effect=mock_smartbox.get_mock_socket,
+    ):
+        yield mock_smartbox
+
+
 @pytest.fixture
 def mock_setup_entry() -> Generator[AsyncMock]:
     """Override async_setup_entry."""
@@ -160,7 +193,9 @@ def mock_create_smartbox_session():
 
 @pytest.fixture
 def mock_get_devices(mock_devices):
-    with patch("custom_components.smartbox.get_devices", return_value=mock_devices):
+    with patch(
+        "custom_components.smartbox.get_devices", return_value=(mock_devices, [])
+    ):
         yield
 
 
@@ -1,7 +1,8 @@
+import asyncio
 from copy import deepcopy
 import logging
 from typing import Any
-from unittest.mock import AsyncMock
+from unittest.mock import DEFAULT, AsyncMock
 
 from homeassistant.components.climate.const import DOMAIN as CLIMATE_DOMAIN
 from homeassistant.components.number import DOMAIN as NUMBER_DOMAIN
@@ -175,8 +176,11 @@ class MockSmartbox:
         mock_device_power: dict[str, dict[int, StatusDict]],
         mock_node_status: dict[str, dict[int, StatusDict]],
         start_available=True,
+        latency: float = 0,
     ):
         self.config = mock_config
+        # artificial delay applied to every mocked API read
+        self._latency = latency
         assert len(mock_config[DOMAIN]) == 4
         config_dev_ids = mock_config[DOMAIN][CONF_DEVICE_IDS]
         self._home_info = mock_home_info
@@ -204,6 +208,10 @@ class MockSmartbox:
     def _get_device(self, dev_id):
         return self._device_info[dev_id]
 
+    async def _api_delay(self):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+
     def _create_mock_session(self):
         mock_session = AsyncMock()
         mock_session.get_devices.return_value = self._devices
@@ -215,17 +223,32 @@ class MockSmartbox:
             web_url="https://web_url/",
         )
 
-        def get_homes():
+        async def get_homes():
+            await self._api_delay()
             return self._home_info
 
         mock_session.get_homes.side_effect = get_homes
 
-        def get_nodes(dev_id):
+        async def get_nodes(dev_id):
+            await self._api_delay()
             return self._node_info[dev_id]
 
         mock_session.get_nodes.side_effect = get_nodes
 
+        async def get_device_connected(dev_id):
+            await self._api_delay()
+            return DEFAULT
+
+        mock_session.get_device_connected.side_effect = get_device_connected
+
+        async def get_node_samples(dev_id, node, start_time, end_time):
+            await self._api_delay()
+            return DEFAULT
+
+        mock_session.get_node_samples.side_effect = get_node_samples
+
         async def get_node_status(dev_id, node):
+            await self._api_delay()
             return self._get_session_status(dev_id, node["addr"])
 
         mock_session.get_status.side_effect = get_node_status
@@ -239,6 +262,7 @@ class MockSmartbox:
         mock_session.set_node_status = set_node_status
 
         async def get_node_setup(dev_id, node):
+            await self._api_delay()
             return self._session_node_setup[dev_id][node["addr"]]
 
         mock_session.get_node_setup = get_node_setup
@@ -252,6 +276,7 @@ class MockSmartbox:
         mock_session.set_node_setup = set_node_setup
 
         async def get_device_power_limit(dev_id, node=None):
+            await self._api_delay()
             if node is not None:
                 return self._session_node_setup[dev_id][node["addr"]]["power"]
             return self._mock_device_power[dev_id]
@@ -259,11 +284,13 @@ class MockSmartbox:
         mock_session.get_device_power_limit = get_device_power_limit
 
         async def get_device_away_status(dev_id):
+            await self._api_delay()
             return self._mock_node_away[dev_id]
 
         mock_session.get_device_away_status = get_device_away_status
 
         async def get_node_version(dev_id, node):
+            await self._api_delay()
             node_info = self._node_info[dev_id][node["addr"]]
             return {"hw_version": node_info.get("fw_version"), "pid": node_info.get("product_id")}
 
@@ -18,6 +18,7 @@ from homeassistant.components.climate.const import (
     SERVICE_SET_TEMPERATURE,
 )
 from homeassistant.const import (
+    ATTR_DEVICE_ID,
     ATTR_ENTITY_ID,
     ATTR_FRIENDLY_NAME,
     ATTR_LOCKED,
@@ -27,9 +28,12 @@ from homeassistant.const import (
     SERVICE_TURN_ON,
     STATE_UNAVAILABLE,
 )
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.entity_component import async_update_entity
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
+from smartbox.error import SmartboxError
+import voluptuous as vol
 
 from custom_components.smartbox.climate import SmartboxHeater, get_hvac_mode
 from custom_components.smartbox.const import (
@@ -37,6 +41,7 @@ from custom_components.smartbox.const import (
     PRESET_FROST,
     PRESET_SCHEDULE,
     PRESET_SELF_LEARN,
+    SERVICE_BULK_SET,
     SmartboxNodeType,
 )
 
@@ -689,6 +694,106 @@ async def test_set_target_temp(hass, mock_smartbox, config_entry):
                 assert new_target_temp == pytest.approx(old_target_temp + 1)
 
 
+async def test_bulk_set(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    heaters = {
+        f"{mock_device['dev_id']}_{mock_node['addr']}": get_climate_entity_id(mock_node)
+        for mock_device in await mock_smartbox.session.get_devices()
+        for mock_node in await mock_smartbox.session.get_nodes(mock_device["dev_id"])
+        if is_heater_node(mock_node)
+    }
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_BULK_SET,
+        {ATTR_HVAC_MODE: HVACMode.OFF, ATTR_ENTITY_ID: list(heaters.values())},
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {node_id: {"success": True} for node_id in heaters}
+    mock_nodes = {
+        f"{mock_device['dev_id']}_{mock_node['addr']}": (mock_device, mock_node)
+        for mock_device in await mock_smartbox.session.get_devices()
+        for mock_node in await mock_smartbox.session.get_nodes(mock_device["dev_id"])
+        if is_heater_node(mock_node)
+    }
+    for mock_device, mock_node in mock_nodes.values():
+        mock_node_status = await mock_smartbox.session.get_status(
+            mock_device["dev_id"], mock_node
+        )
+        assert get_hvac_mode(mock_node["type"], mock_node_status) == HVACMode.OFF
+
+    # presets and temperatures are translated for each node type
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_BULK_SET,
+        {
+            ATTR_PRESET_MODE: PRESET_ECO,
+            ATTR_TEMPERATURE: 19,
+            ATTR_ENTITY_ID: list(heaters.values()),
+        },
+        blocking=True,
+        return_response=True,
+    )
+    for heater_id, (mock_device, mock_node) in mock_nodes.items():
+        mock_node_status = await mock_smartbox.session.get_status(
+            mock_device["dev_id"], mock_node
+        )
+        if mock_node["type"] == SmartboxNodeType.HTR_MOD:
+            assert response[heater_id] == {"success": True}
+            assert mock_node_status["selected_temp"] == "eco"
+            assert mock_node_status["mode"] == "manual"
+            assert float(mock_node_status["comfort_temp"]) == pytest.approx(
+                19 + float(mock_node_status["eco_offset"])
+            )
+        else:
+            assert response[heater_id] == {
+                "success": False,
+                "error": f"{mock_node['type']} nodes do not support preset eco",
+            }
+
+    # devices are resolved to their nodes, and failures reported per node
+    node_id = next(iter(heaters))
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, node_id)})
+    set_node_status = mock_smartbox.session.set_node_status
+
+    async def _set_node_status(dev_id, node, status_updates):
+        if f"{dev_id}_{node['addr']}" == node_id:
+            msg = "write"
+            raise SmartboxError(msg)
+        await set_node_status(dev_id, node, status_updates)
+
+    mock_smartbox.session.set_node_status = _set_node_status
+    other_node_id = list(heaters)[1]
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_BULK_SET,
+        {
+            ATTR_HVAC_MODE: HVACMode.AUTO,
+            ATTR_DEVICE_ID: device.id,
+            ATTR_ENTITY_ID: heaters[other_node_id],
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert response == {
+        node_id: {"success": False, "error": "write"},
+        other_node_id: {"success": True},
+    }
+
+    # raw status fields are not sent through
+    for data in ({}, {"mode": "off"}, {ATTR_PRESET_MODE: PRESET_AWAY}):
+        with pytest.raises(vol.Invalid):
+            await hass.services.async_call(
+                DOMAIN,
+                SERVICE_BULK_SET,
+                {**data, ATTR_ENTITY_ID: heaters[other_node_id]},
+                blocking=True,
+                return_response=True,
+            )
+
+
 async def test_unavailable_at_startup(hass, mock_smartbox_unavailable, config_entry):
     assert await hass.config_entries.async_setup(config_entry.entry_id)
     await hass.async_block_till_done()
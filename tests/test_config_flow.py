@@ -49,6 +49,24 @@ async def test_integration_already_exists(
     assert result["reason"] == "already_configured"
 
 
+async def test_user_flow_hands_over_session(
+    hass: HomeAssistant, mock_smartbox, reseller
+) -> None:
+    """Test the entry is set up with the session validated by the flow."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_USER},
+        data=MOCK_SMARTBOX_CONFIG[DOMAIN],
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    entry = result["result"]
+    assert entry.runtime_data.client is mock_smartbox.session
+    mock_smartbox.session.health_check.assert_awaited_once()
+    mock_smartbox.session.check_refresh_auth.assert_awaited_once()
+
+
 async def test_option_flow(hass: HomeAssistant, config_entry) -> None:
     """Test config flow options."""
     valid_option = {
@@ -1,16 +1,42 @@
-from unittest.mock import AsyncMock, patch
+import asyncio
+from datetime import timedelta
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
 
+from homeassistant.const import ATTR_ENTITY_PICTURE, CONF_PASSWORD, CONF_USERNAME
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import DATA_DISPATCHER
+from homeassistant.util import dt as dt_util
 import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
 from custom_components.smartbox import (
+    PLATFORMS,
     APIUnavailableError,
     InvalidAuthError,
+    SessionFactory,
     SmartboxError,
+    _async_cancel_devices,
     async_setup_entry,
     create_smartbox_session_from_entry,
     update_listener,
 )
+from custom_components.smartbox.const import (
+    ATTR_POLL_INTERVAL,
+    CONF_API_NAME,
+    CONF_DISPLAY_ENTITY_PICTURES,
+    CONF_HISTORY_CONSUMPTION,
+    CONF_TIMEDELTA_POWER,
+    HEALTH_CHECK_TTL,
+    RUNTIME_CACHE_GRACE_PERIOD,
+    SMARTBOX_TEARDOWN,
+    HistoryConsumptionStatus,
+    SmartboxNodeType,
+)
+
+from .const import DOMAIN
+from .mocks import get_climate_entity_id, get_sensor_entity_id
 
 
 @pytest.mark.asyncio
@@ -102,7 +128,388 @@ async def test_create_smartbox_session_from_entry_smartbox_error(hass, config_en
 
 
 @pytest.mark.asyncio
-async def test_update_listener(hass, config_entry):
+async def test_update_listener(hass, mock_smartbox, config_entry, recorder_mock):
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO},
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    mock_node = next(
+        node
+        for node in await mock_smartbox.session.get_nodes("device_2")
+        if node["type"] == SmartboxNodeType.PMO
+    )
+    entity_id = get_sensor_entity_id(mock_node, "power")
+    # the options are handled once per platform, not once per entity
+    assert len(
+        hass.data[DATA_DISPATCHER][f"{DOMAIN}_{config_entry.entry_id}_options_updated"]
+    ) == len(PLATFORMS)
+
     with patch.object(hass.config_entries, "async_reload", AsyncMock()) as mock_reload:
-        await update_listener(hass, config_entry)
+        # hot applied options update the running entities
+        hass.config_entries.async_update_entry(
+            config_entry,
+            options={
+                **config_entry.options,
+                CONF_DISPLAY_ENTITY_PICTURES: True,
+                CONF_TIMEDELTA_POWER: 120,
+            },
+        )
+        await hass.async_block_till_done()
+        mock_reload.assert_not_called()
+        state = hass.states.get(entity_id)
+        assert state.attributes[ATTR_ENTITY_PICTURE].endswith("img/favicon.ico")
+        assert state.attributes[ATTR_POLL_INTERVAL] == 120
+
+        # the history is imported again, switching back to auto once done
+        hass.config_entries.async_update_entry(
+            config_entry,
+            options={
+                **config_entry.options,
+                CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.START,
+            },
+        )
+        await hass.async_block_till_done(wait_background_tasks=True)
+        mock_reload.assert_not_called()
+        assert all(
+            node.backfill is not None for node in config_entry.runtime_data.nodes
+        )
+        assert (
+            config_entry.options[CONF_HISTORY_CONSUMPTION]
+            == HistoryConsumptionStatus.AUTO
+        )
+
+        # and again when start is selected once more
+        backfills = [node.backfill for node in config_entry.runtime_data.nodes]
+        hass.config_entries.async_update_entry(
+            config_entry,
+            options={
+                **config_entry.options,
+                CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.START,
+            },
+        )
+        await hass.async_block_till_done(wait_background_tasks=True)
+        assert all(
+            node.backfill is not backfill and not node.backfill_pending
+            for node, backfill in zip(
+                config_entry.runtime_data.nodes, backfills, strict=True
+            )
+        )
+        assert (
+            config_entry.options[CONF_HISTORY_CONSUMPTION]
+            == HistoryConsumptionStatus.AUTO
+        )
+
+        # other changes reload the entry
+        hass.config_entries.async_update_entry(
+            config_entry, options={**config_entry.options, "other": True}
+        )
+        await hass.async_block_till_done()
         mock_reload.assert_called_once_with(config_entry.entry_id)
+
+        # so does calling the listener with changed options
+        config_entry.runtime_data.options = {}
+        await update_listener(hass, config_entry)
+        assert mock_reload.call_count == 2
+
+
+async def test_setup_retries_failed_devices(hass, mock_smartbox, config_entry):
+    # no history backfill, its completion would reload the entry
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO},
+    )
+    session = mock_smartbox.session
+    get_nodes = session.get_nodes.side_effect
+    failures = []
+
+    async def _get_nodes(dev_id):
+        if dev_id == "device_1" and not failures:
+            failures.append(dev_id)
+            # the retry creates a fresh update manager for the device
+            mock_smartbox._sockets.pop(dev_id)
+            raise SmartboxError
+        return await get_nodes(dev_id)
+
+    session.get_nodes.side_effect = _get_nodes
+
+    with patch("custom_components.smartbox.DEVICE_RETRY_INTERVAL", 0):
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert failures == ["device_1"]
+    assert [device.dev_id for device in config_entry.runtime_data.devices] == [
+        "device_2",
+        "device_1",
+    ]
+    mock_node = (await session.get_nodes("device_1"))[0]
+    assert hass.states.get(get_climate_entity_id(mock_node)) is not None
+
+
+async def test_setup_from_snapshot(hass, hass_storage, mock_smartbox, config_entry):
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO},
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert f"{DOMAIN}.{config_entry.entry_id}" in hass_storage
+    # past the grace period, the devices are disconnected and set up again
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=RUNTIME_CACHE_GRACE_PERIOD)
+    )
+    await hass.async_block_till_done()
+
+    # the entities come back while the API is unreachable, without waiting for
+    # the samples
+    mock_smartbox._sockets.clear()
+    session = mock_smartbox.session
+    session.health_check.side_effect = APIUnavailableError
+    session.check_refresh_auth.side_effect = APIUnavailableError
+    session.get_nodes.reset_mock()
+    get_node_samples = session.get_node_samples.side_effect
+
+    async def _unanswered_samples(*_args):
+        await asyncio.Event().wait()
+
+    session.get_node_samples.side_effect = _unanswered_samples
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    mock_node = (await session.get_nodes("device_1"))[0]
+    session.get_nodes.reset_mock()
+    assert hass.states.get(get_climate_entity_id(mock_node)) is not None
+    assert all(
+        device._watchdog_task is None for device in config_entry.runtime_data.devices
+    )
+    assert session.get_node_samples.await_count
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    session.get_node_samples.side_effect = get_node_samples
+
+    # and are reconciled in the background once it answers
+    mock_smartbox._sockets.clear()
+    session.health_check.side_effect = None
+    session.check_refresh_auth.side_effect = None
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert session.get_nodes.await_count == len(config_entry.runtime_data.devices)
+    assert all(
+        device._watchdog_task is not None
+        for device in config_entry.runtime_data.devices
+    )
+
+
+async def test_reconcile_removes_gone_devices_and_nodes(
+    hass, hass_storage, mock_smartbox, config_entry
+):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    session = mock_smartbox.session
+    gone_node = (await session.get_nodes("device_1"))[-1]
+    assert hass.states.get(get_climate_entity_id(gone_node)) is not None
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=RUNTIME_CACHE_GRACE_PERIOD)
+    )
+    await hass.async_block_till_done()
+    hass.data.pop(SMARTBOX_TEARDOWN, None)
+
+    # device_2 left the account and a node of device_1 was removed
+    gone_node_ids = {
+        "device_1_" + str(gone_node["addr"]),
+        *(
+            f"device_2_{mock_node['addr']}"
+            for mock_node in await session.get_nodes("device_2")
+        ),
+    }
+    mock_smartbox._home_info = [
+        {
+            **home,
+            "devs": [dev for dev in home["devs"] if dev["dev_id"] != "device_2"],
+        }
+        for home in mock_smartbox._home_info
+    ]
+    mock_smartbox._node_info = {
+        **mock_smartbox._node_info,
+        "device_1": mock_smartbox._node_info["device_1"][:-1],
+    }
+    mock_smartbox._sockets.clear()
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    runtime_data = config_entry.runtime_data
+    assert [device.dev_id for device in runtime_data.devices] == ["device_1"]
+    assert hass.data[SMARTBOX_TEARDOWN][config_entry.entry_id].keys() == {"device_2"}
+    node_ids = {node.node_id for node in runtime_data.nodes}
+    assert node_ids == {node.node_id for node in runtime_data.devices[0].get_nodes()}
+    device_registry = dr.async_get(hass)
+    assert not node_ids & gone_node_ids
+    for node_id in gone_node_ids:
+        assert device_registry.async_get_device(identifiers={(DOMAIN, node_id)}) is None
+    assert hass.states.get(get_climate_entity_id(gone_node)) is None
+    mock_node = (await session.get_nodes("device_1"))[0]
+    assert hass.states.get(get_climate_entity_id(mock_node)) is not None
+
+
+async def test_reload_reuses_devices(hass, mock_smartbox, config_entry):
+    hass.config_entries.async_update_entry(
+        config_entry,
+        options={CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO},
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    session = mock_smartbox.session
+    devices = config_entry.runtime_data.devices
+    mock_node = (await session.get_nodes("device_1"))[0]
+    session.get_devices.reset_mock()
+    session.get_nodes.reset_mock()
+
+    # a reload within the grace period goes back to neither the API nor the socket
+    with patch(
+        "custom_components.smartbox.create_smartbox_session_from_entry"
+    ) as mock_create_session:
+        assert await hass.config_entries.async_reload(config_entry.entry_id)
+        await hass.async_block_till_done()
+    mock_create_session.assert_not_called()
+    session.get_devices.assert_not_awaited()
+    session.get_nodes.assert_not_awaited()
+    assert config_entry.runtime_data.devices == devices
+    assert config_entry.runtime_data.client is session
+    assert all(device._watchdog_task is not None for device in devices)
+    assert hass.states.get(get_climate_entity_id(mock_node)) is not None
+
+    # past it the devices are disconnected, the diagnostics showing them cached
+    # until then
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    teardown = hass.data[SMARTBOX_TEARDOWN][config_entry.entry_id]
+    assert teardown == {device.dev_id: {"cached": True} for device in devices}
+    with patch.object(type(devices[0]), "cancel", autospec=True) as mock_cancel:
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=RUNTIME_CACHE_GRACE_PERIOD)
+        )
+        await hass.async_block_till_done()
+    assert [call.args[0] for call in mock_cancel.await_args_list] == devices
+    assert teardown.keys() == {device.dev_id for device in devices}
+    assert all(not device_teardown["aborted"] for device_teardown in teardown.values())
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert config_entry.runtime_data.devices != devices
+
+
+async def test_cancel_devices(hass):
+    fast_device = MagicMock(dev_id="device_1", cancel=AsyncMock())
+    hung_device = MagicMock(dev_id="device_2")
+
+    async def _cancel():
+        await asyncio.Event().wait()
+
+    hung_device.cancel = _cancel
+    with patch("custom_components.smartbox.DEVICE_TEARDOWN_TIMEOUT", 0.05):
+        await _async_cancel_devices(hass, "entry_1", [hung_device, fast_device])
+
+    # the devices are disconnected concurrently, the hung one aborted
+    fast_device.cancel.assert_awaited_once()
+    fast_device.abort.assert_not_called()
+    hung_device.abort.assert_called_once()
+    teardown = hass.data[SMARTBOX_TEARDOWN]["entry_1"]
+    assert teardown["device_1"]["duration"] < 0.05
+    assert not teardown["device_1"]["aborted"]
+    assert teardown["device_2"]["duration"] >= 0.05
+    assert teardown["device_2"]["aborted"]
+
+
+async def test_session_factory(hass):
+    account_1 = {
+        CONF_API_NAME: "api_1",
+        CONF_USERNAME: "user_1",
+        CONF_PASSWORD: "password",
+    }
+    account_2 = {**account_1, CONF_USERNAME: "user_2"}
+    sessions = [AsyncMock(), AsyncMock(), AsyncMock(), AsyncMock()]
+    factory = SessionFactory(hass)
+    with patch(
+        "custom_components.smartbox.create_smartbox_session_from_entry",
+        side_effect=sessions,
+    ) as mock_create:
+        # every setup logs in with its own session
+        assert (
+            await asyncio.gather(
+                factory.async_get_session(account_1),
+                factory.async_get_session(account_2),
+            )
+            == sessions[:2]
+        )
+        sessions[0].check_refresh_auth.assert_awaited_once()
+        sessions[1].check_refresh_auth.assert_awaited_once()
+        # but the reseller is health checked once within HEALTH_CHECK_TTL
+        sessions[0].health_check.assert_awaited_once()
+        sessions[1].health_check.assert_not_awaited()
+
+        # a setup from a snapshot does not check the login
+        assert await factory.async_get_session(account_1, validate=False) is sessions[2]
+        sessions[2].check_refresh_auth.assert_not_awaited()
+        assert mock_create.call_count == 3
+
+        # and again once it expired
+        expired = time.monotonic() + HEALTH_CHECK_TTL
+        with patch("custom_components.smartbox.time") as mock_time:
+            mock_time.monotonic.return_value = expired
+            assert await factory.async_get_session(account_1) is sessions[3]
+        sessions[3].health_check.assert_awaited_once()
+
+
+async def test_session_factory_validated_session(hass):
+    account = {CONF_API_NAME: "api_1", CONF_USERNAME: "user_1", CONF_PASSWORD: "pw"}
+    validated_session = AsyncMock()
+    factory = SessionFactory(hass)
+    with patch(
+        "custom_components.smartbox.create_smartbox_session_from_entry",
+        side_effect=lambda *_args, **_kwargs: AsyncMock(),
+    ) as mock_create:
+        # a session validated by the flow is used by the first setup only
+        factory.add_validated(account, validated_session)
+        assert await factory.async_get_session(account) is validated_session
+        mock_create.assert_not_called()
+        validated_session.check_refresh_auth.assert_not_awaited()
+        assert await factory.async_get_session(account) is not validated_session
+
+        # and only with the validated password, within its time to live
+        factory = SessionFactory(hass)
+        factory.add_validated(account, validated_session)
+        changed_password = {**account, CONF_PASSWORD: "other"}
+        assert (
+            await factory.async_get_session(changed_password) is not validated_session
+        )
+        factory = SessionFactory(hass)
+        with patch("custom_components.smartbox.VALIDATED_SESSION_TTL", 0):
+            factory.add_validated(account, validated_session)
+        assert await factory.async_get_session(account) is not validated_session
+
+
+async def test_remove_entry_snapshot(hass, hass_storage, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    await hass.config_entries.async_remove(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert f"{DOMAIN}.{config_entry.entry_id}" not in hass_storage
+
+
+async def test_unload_removes_listeners(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    runtime_data = config_entry.runtime_data
+
+    def _listener_count() -> int:
+        return sum(device.listener_count for device in runtime_data.devices) + sum(
+            node.listener_count for node in runtime_data.nodes
+        )
+
+    assert _listener_count() > 0
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert _listener_count() == 0
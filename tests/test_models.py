@@ -1,6 +1,9 @@
+import asyncio
 from datetime import datetime, timedelta
+import json
 import logging
-from unittest.mock import AsyncMock, MagicMock, NonCallableMock, patch
+import time
+from unittest.mock import AsyncMock, MagicMock, NonCallableMock, call, patch
 
 from dateutil import tz
 from homeassistant.components.climate import (
@@ -13,16 +16,23 @@ from homeassistant.components.climate import (
     UnitOfTemperature,
 )
 import pytest
+from smartbox.error import InvalidAuthError, SmartboxError
 
 from custom_components.smartbox.const import (
+    BACKFILL_CHUNK,
     PRESET_FROST,
     PRESET_SCHEDULE,
     PRESET_SELF_LEARN,
+    SAMPLES_CURSOR_OVERLAP,
+    SAMPLES_WINDOW,
     SmartboxNodeType,
 )
 from custom_components.smartbox.models import (
+    PowerPoller,
+    SamplesCoordinator,
     SmartboxDevice,
     SmartboxNode,
+    get_devices,
     get_hvac_mode,
     get_target_temperature,
     get_temperature_unit,
@@ -31,7 +41,7 @@ from custom_components.smartbox.models import (
     set_temperature_args,
 )
 
-from .const import MOCK_SMARTBOX_DEVICE_INFO
+from .const import MOCK_SMARTBOX_DEVICE_INFO, MOCK_SMARTBOX_NODE_INFO
 from .test_utils import assert_log_message
 
 _LOGGER = logging.getLogger(__name__)
@@ -122,7 +132,9 @@ async def test_cancel(hass, caplog):
         device = SmartboxDevice(MOCK_SMARTBOX_DEVICE_INFO[dev_id], mock_session, hass)
         device.update_manager = AsyncMock()
         device._watchdog_task = _MockTask(is_done=True)
-        with caplog.at_level(logging.WARNING, logger="custom_components.smartbox.models"):
+        with caplog.at_level(
+            logging.WARNING, logger="custom_components.smartbox.models"
+        ):
             await device.cancel()
         device.update_manager.cancel.assert_awaited_once()
         device._watchdog_task.cancel.assert_not_called()
@@ -132,7 +144,9 @@ async def test_cancel(hass, caplog):
         device = SmartboxDevice(MOCK_SMARTBOX_DEVICE_INFO[dev_id], mock_session, hass)
         device.update_manager = AsyncMock()
         device._watchdog_task = _MockTask(is_done=False)
-        with caplog.at_level(logging.WARNING, logger="custom_components.smartbox.models"):
+        with caplog.at_level(
+            logging.WARNING, logger="custom_components.smartbox.models"
+        ):
             await device.cancel()
         device.update_manager.cancel.assert_awaited_once()
         device._watchdog_task.cancel.assert_called_once()
@@ -144,6 +158,121 @@ async def test_cancel(hass, caplog):
         )
 
 
+async def test_initialise_nodes_concurrently(hass, mock_smartbox_latency):
+    """Node creation overlaps API round trips instead of chaining them."""
+    dev_id = "device_2"
+    session = mock_smartbox_latency.session
+
+    async def _timed_initialise(max_concurrent_requests: int):
+        mock_smartbox_latency._sockets.clear()
+        start = time.monotonic()
+        device = await SmartboxDevice.initialise_nodes(
+            MOCK_SMARTBOX_DEVICE_INFO[dev_id],
+            session,
+            hass,
+            max_concurrent_requests=max_concurrent_requests,
+        )
+        elapsed = time.monotonic() - start
+        await hass.async_block_till_done()
+        await device.cancel()
+        return device, elapsed
+
+    sequential, sequential_time = await _timed_initialise(1)
+    concurrent, concurrent_time = await _timed_initialise(10)
+    assert concurrent_time < sequential_time / 2
+
+    # node order follows the API order whatever the completion order
+    expected_nodes = [(n["type"], n["addr"]) for n in MOCK_SMARTBOX_NODE_INFO[dev_id]]
+    assert [(n.node_type, n.addr) for n in sequential.get_nodes()] == expected_nodes
+    assert [(n.node_type, n.addr) for n in concurrent.get_nodes()] == expected_nodes
+
+
+async def test_initialise_nodes_error(hass, mock_smartbox_latency):
+    """A failing node aborts the device initialisation with the original error."""
+    session = mock_smartbox_latency.session
+    get_node_status = session.get_node_status.side_effect
+
+    async def _get_node_status(dev_id, node):
+        if node["addr"] == 1:
+            msg = "node unreachable"
+            raise SmartboxError(msg)
+        return await get_node_status(dev_id, node)
+
+    session.get_node_status.side_effect = _get_node_status
+
+    with pytest.raises(SmartboxError, match="node unreachable") as exc_info:
+        await SmartboxDevice.initialise_nodes(
+            MOCK_SMARTBOX_DEVICE_INFO["device_1"], session, hass
+        )
+    assert exc_info.value.__notes__ == [
+        (
+            "Failed to create acm node 1 of device device_1: "
+            "status (SmartboxError('node unreachable'))"
+        )
+    ]
+
+
+async def test_get_devices_partial_failure(hass, mock_smartbox_latency):
+    """A gateway that does not answer in time does not hold up the others."""
+    session = mock_smartbox_latency.session
+    get_nodes = session.get_nodes.side_effect
+
+    async def _get_nodes(dev_id):
+        if dev_id == "device_1":
+            await asyncio.sleep(10)
+        return await get_nodes(dev_id)
+
+    session.get_nodes.side_effect = _get_nodes
+
+    devices, failed = await get_devices(session, hass, device_timeout=0.5)
+    assert [device.dev_id for device in devices] == ["device_2"]
+    assert devices[0].home["id"] == "home_1"
+    assert [device["dev_id"] for device in failed] == ["device_1"]
+
+    await hass.async_block_till_done()
+    for device in devices:
+        await device.cancel()
+
+
+@pytest.mark.parametrize("dev_id", ["device_1", "device_2"])
+async def test_smartbox_device_snapshot(hass, mock_smartbox_latency, dev_id):
+    """A device restored from its snapshot is reconciled in place."""
+    session = mock_smartbox_latency.session
+    device_info = MOCK_SMARTBOX_DEVICE_INFO[dev_id]
+    device = await SmartboxDevice.initialise_nodes(device_info, session, hass)
+    await hass.async_block_till_done()
+    await device.cancel()
+    # the snapshot goes through the JSON store
+    snapshot = json.loads(json.dumps(device.as_snapshot()))
+
+    mock_smartbox_latency._sockets.clear()
+    session.reset_mock()
+    restored = SmartboxDevice.from_snapshot(snapshot, session, hass)
+    assert session.method_calls == []
+    assert restored.device == device.device
+    assert restored.away == device.away
+    nodes = restored.get_nodes()
+    for node, restored_node in zip(device.get_nodes(), nodes, strict=True):
+        assert restored_node.node_info == node.node_info
+        assert restored_node.status == node.status
+        assert restored_node.setup == node.setup
+        assert restored_node.version == node.version
+        assert restored_node.total_energy is None
+    assert restored._watchdog_task is None
+
+    statuses = [node.status for node in nodes]
+    await restored.reconcile(device_info)
+    assert restored.get_nodes() == nodes
+    # the entities keep the status they hold
+    assert all(
+        node.status is status for node, status in zip(nodes, statuses, strict=True)
+    )
+    assert restored.connected == device.connected
+    assert restored._watchdog_task is not None
+    await hass.async_block_till_done()
+    await restored.cancel()
+
+
 async def test_smartbox_device_node_status_update(hass, caplog):
     """Independently test node status updates usually called by UpdateManager."""
     dev_id = "device_1"
@@ -195,6 +324,296 @@ async def test_smartbox_device_node_status_update(hass, caplog):
         )
 
 
+@pytest.mark.parametrize("coalesce_window", [0, 0.05])
+async def test_smartbox_device_coalesces_node_updates(hass, coalesce_window):
+    """A burst of node updates is dispatched once per node and kind."""
+    mock_node_1 = MagicMock(node_id="device_1_1", status={"mtemp": "20"}, setup={})
+    mock_node_1.update_status.side_effect = [{"mtemp"}, {"stemp"}, {"mtemp"}]
+    mock_node_2 = MagicMock(node_id="device_1_2", status={}, setup={})
+    mock_node_2.update_status.return_value = {"charging"}
+    device = SmartboxDevice(
+        MOCK_SMARTBOX_DEVICE_INFO["device_1"],
+        MagicMock(),
+        hass,
+        coalesce_window=coalesce_window,
+    )
+    device._nodes = {
+        (SmartboxNodeType.HTR, 1): mock_node_1,
+        (SmartboxNodeType.ACM, 2): mock_node_2,
+    }
+
+    for status in ({"mtemp": "21"}, {"stemp": "22"}, {"mtemp": "21.5"}):
+        device._node_status_update(SmartboxNodeType.HTR, 1, status)
+    device._node_status_update(SmartboxNodeType.ACM, 2, {"charging": True})
+    device._node_setup_update(SmartboxNodeType.HTR, 1, {"a": 1})
+    device._node_setup_update(SmartboxNodeType.HTR, 1, {"a": 2})
+    await asyncio.sleep(0)
+    if coalesce_window:
+        mock_node_1.notify.assert_not_called()
+        await asyncio.sleep(coalesce_window * 2)
+
+    assert mock_node_1.notify.call_args_list == [
+        call("status", {"mtemp": "20"}, {"mtemp", "stemp"}),
+        call("setup", {}),
+    ]
+    mock_node_2.notify.assert_called_once_with("status", {}, {"charging"})
+    assert device.received_updates == 6
+    assert device.merged_updates == 3
+
+
+async def test_listener_registry(hass):
+    """Listeners are called directly and can be removed."""
+    device = SmartboxDevice(MOCK_SMARTBOX_DEVICE_INFO["device_1"], MagicMock(), hass)
+    node = SmartboxNode(
+        device,
+        MOCK_SMARTBOX_NODE_INFO["device_1"][0],
+        MagicMock(),
+        {"mtemp": "20"},
+        {},
+        [],
+        {},
+    )
+    device._nodes = {(node.node_type, node.addr): node}
+    status_listener = MagicMock(side_effect=[ValueError, None])
+    connected_listener = MagicMock()
+    away_listener = MagicMock()
+    remove_status = node.add_listener("status", status_listener)
+    # device events are registered on the device
+    remove_connected = node.add_listener("connected", connected_listener)
+    node.add_listener("away_status", away_listener)
+    assert node.listener_count == 2
+    assert device.listener_count == 1
+
+    device._connected(connected=True)
+    connected_listener.assert_called_once_with(device.connected)
+    assert device.connected is True
+    device._away_status_update({"away": True})
+    away_listener.assert_called_once_with(node.away)
+    assert node.away is True
+    # a failing listener does not stop the others
+    node.notify("status", node.status, {"mtemp"})
+    node.notify("status", node.status, {"mtemp"})
+    assert status_listener.call_count == 2
+
+    remove_status()
+    remove_connected()
+    remove_status()
+    assert node.listener_count == 1
+    assert device.listener_count == 0
+    node.notify("status", node.status, {"mtemp"})
+    assert status_listener.call_count == 2
+
+
+async def test_samples_coordinator(hass):
+    """The samples of every node are fetched once per cycle, within the limit."""
+    device = SmartboxDevice(MOCK_SMARTBOX_DEVICE_INFO["device_1"], MagicMock(), hass)
+    coordinator = SamplesCoordinator(
+        device, hass, jitter=0.01, max_concurrent_requests=2
+    )
+    in_flight = []
+    max_in_flight = 0
+
+    async def _get_samples(start_time, end_time):
+        nonlocal max_in_flight
+        in_flight.append(start_time)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        assert end_time - start_time == 25 * 3600
+        return [{"t": start_time, "counter": 1}, {"t": end_time, "counter": 2}]
+
+    nodes = [
+        MagicMock(get_samples=AsyncMock(side_effect=_get_samples), samples_cursor=None)
+        for _ in range(5)
+    ]
+    fetched = []
+
+    async def _listener(samples):
+        # the listeners are only called once every node is fetched
+        fetched.append(sum(node.add_samples.called for node in nodes))
+
+    listeners = [AsyncMock(side_effect=_listener) for _ in nodes]
+    removers = [
+        coordinator.add_node(node, listener)
+        for node, listener in zip(nodes, listeners, strict=True)
+    ]
+    assert coordinator._unsub_interval is not None
+
+    nodes[0].get_samples.side_effect = SmartboxError
+    await coordinator._async_refresh()
+    assert max_in_flight == 2
+    listeners[0].assert_not_awaited()
+    for node, listener in zip(nodes[1:], listeners[1:], strict=True):
+        node.get_samples.assert_awaited_once()
+        samples = node.add_samples.call_args.args[0]
+        listener.assert_awaited_once_with(samples)
+    assert fetched == [4] * 4
+
+    for remove in removers:
+        remove()
+    assert coordinator._unsub_interval is None
+
+
+async def test_samples_coordinator_cursor(hass, freezer):
+    """Samples are fetched from the node cursor, with a small overlap."""
+    device = SmartboxDevice(MOCK_SMARTBOX_DEVICE_INFO["device_1"], MagicMock(), hass)
+    coordinator = SamplesCoordinator(device, hass)
+    node = SmartboxNode(
+        device,
+        {"addr": 1, "name": "Heater", "type": SmartboxNodeType.HTR},
+        MagicMock(),
+        {},
+        {},
+        [],
+        {},
+    )
+    now = int(time.time())
+    node.get_samples = AsyncMock(
+        return_value=[
+            {"t": now - 1800, "counter": 10},
+            {"t": now - 900, "counter": 20},
+        ]
+    )
+    saved = MagicMock()
+    device.add_listener("samples", saved)
+
+    # without a cursor the whole window is fetched
+    await coordinator.async_refresh_node(node)
+    start_time, _ = node.get_samples.await_args.args
+    assert start_time == now - SAMPLES_WINDOW
+    assert node.samples_cursor == now - 900
+    assert node.total_energy == 20
+    saved.assert_called_once()
+
+    # then only from the cursor, minus the overlap
+    node.get_samples.return_value = [
+        {"t": now - 900, "counter": 20},
+        {"t": now, "counter": 30},
+    ]
+    await coordinator.async_refresh_node(node)
+    start_time, _ = node.get_samples.await_args.args
+    assert start_time == now - 900 - SAMPLES_CURSOR_OVERLAP
+    assert node.samples_cursor == now
+    assert node._samples == [
+        {"t": now - 900, "counter": 20},
+        {"t": now, "counter": 30},
+    ]
+
+    # the cursor survives a snapshot round-trip
+    restored = SmartboxNode.from_snapshot(device, MagicMock(), node.as_snapshot())
+    assert restored.samples_cursor == now
+
+    # a cursor older than the window is capped to the window
+    node.samples_cursor = now - 10 * SAMPLES_WINDOW
+    node.get_samples.return_value = []
+    await coordinator.async_refresh_node(node)
+    start_time, _ = node.get_samples.await_args.args
+    assert start_time == now - SAMPLES_WINDOW
+    assert node.samples_cursor == now
+
+
+async def test_samples_coordinator_backfill(hass):
+    """Backfills import one chunk at a time, for a bounded number of nodes."""
+    device = SmartboxDevice(MOCK_SMARTBOX_DEVICE_INFO["device_1"], MagicMock(), hass)
+    coordinator = SamplesCoordinator(device, hass, max_concurrent_backfills=1)
+    in_flight = []
+    windows = []
+
+    async def _get_samples(start_time, end_time):
+        in_flight.append(start_time)
+        assert len(in_flight) == 1
+        windows.append((start_time, end_time))
+        await asyncio.sleep(0)
+        in_flight.pop()
+        return [{"t": start_time, "counter": 1}]
+
+    nodes = []
+    for addr in range(2):
+        node = SmartboxNode(
+            device,
+            {"addr": addr, "name": "Heater", "type": SmartboxNodeType.HTR},
+            MagicMock(),
+            {},
+            {},
+            [],
+            {},
+        )
+        node.get_samples = AsyncMock(side_effect=_get_samples)
+        node.start_backfill(3 * BACKFILL_CHUNK)
+        nodes.append(node)
+    imported = AsyncMock()
+    saved = MagicMock()
+    device.add_listener("samples", saved)
+
+    assert await asyncio.gather(
+        *(coordinator.async_backfill_node(node, imported) for node in nodes)
+    ) == [True, True]
+    assert imported.call_count == saved.call_count == 6
+    start = nodes[0].backfill["start"]
+    assert windows[:3] == [
+        (start + chunk * BACKFILL_CHUNK, start + (chunk + 1) * BACKFILL_CHUNK + 3600)
+        for chunk in range(3)
+    ]
+    for node in nodes:
+        assert not node.backfill_pending
+        assert node.backfill_progress == 1
+
+
+async def test_power_poller(hass):
+    """The poll interval shrinks while the power changes and grows while stable."""
+    poller = PowerPoller(hass, 60, max_interval=200, jitter=0)
+    powers = iter([100, 100, 200, 200, 200, 200])
+    node = MagicMock(status={"power": 100})
+
+    async def _update_power():
+        node.status["power"] = next(powers)
+
+    node.update_power = AsyncMock(side_effect=_update_power)
+    listener = MagicMock()
+    remove = poller.add_node(node, listener)
+    assert poller._unsub_poll is not None
+
+    intervals = []
+    for _ in range(6):
+        await poller._async_poll()
+        intervals.append(poller.interval)
+    assert intervals == [120, 200, 60, 120, 200, 200]
+    listener.assert_called_once()
+
+    # failing polls count as stable readings, whatever the error, and the
+    # polling goes on
+    for error in (SmartboxError, InvalidAuthError, TimeoutError):
+        node.update_power.side_effect = error
+        poller.interval = 60
+        unsub_poll = poller._unsub_poll
+        await poller._async_poll()
+        assert poller.interval == 120
+        assert poller._unsub_poll not in (None, unsub_poll)
+
+    # so does a failing listener
+    node.update_power.side_effect = _update_power
+    powers = iter([300])
+    listener.side_effect = ValueError
+    unsub_poll = poller._unsub_poll
+    await poller._async_poll()
+    assert poller.interval == 60
+    assert poller._unsub_poll not in (None, unsub_poll)
+
+    # a cancelled poll does not schedule the next one
+    poller._unsub_poll()
+    node.update_power.side_effect = asyncio.Event().wait
+    poll = asyncio.ensure_future(poller._async_poll())
+    await asyncio.sleep(0)
+    poll.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await poll
+    assert poller.interval == 60
+    assert poller._unsub_poll is None
+
+    remove()
+    assert poller._unsub_poll is None
+
+
 async def test_smartbox_device_node_setup_update(hass, caplog):
     """Independently test node setup updates usually called by UpdateManager."""
     dev_id = "device_1"
@@ -241,6 +660,7 @@ async def test_smartbox_node(hass):
     dev_id = "test_device_id_1"
     mock_device = AsyncMock()
     mock_device.dev_id = dev_id
+    mock_device.hass = hass
     mock_device.away = False
     node_addr = 3
     node_type = SmartboxNodeType.HTR
@@ -271,8 +691,10 @@ async def test_smartbox_node(hass):
 
     assert node.status == initial_status
     new_status = {"mtemp": "21.6", "stemp": "22.5"}
-    node.update_status(new_status)
+    assert node.update_status(new_status) == {"mtemp"}
     assert node.status == new_status
+    assert node.update_status({"stemp": "22.5", "active": True}) == {"active"}
+    assert node.update_status({"active": True}) == set()
 
     await node.set_status(stemp=23.5)
     mock_session.set_node_status.assert_called_with(dev_id, node_info, {"stemp": 23.5})
@@ -301,6 +723,206 @@ async def test_smartbox_node(hass):
         node.true_radiant
 
 
+async def test_smartbox_node_set_status_coalesced(hass):
+    """Status writes within the window are merged into one, in order."""
+    node_info = {"addr": 3, "name": "Heater", "type": SmartboxNodeType.HTR}
+    mock_device = MagicMock(dev_id="device_1", hass=hass)
+    mock_session = AsyncMock()
+    node = SmartboxNode(mock_device, node_info, mock_session, {}, {}, [], {})
+    node.write_window = 0.01
+
+    statuses = await asyncio.gather(
+        node.set_status(stemp="20"),
+        node.set_status(stemp="21", units="C"),
+        node.set_status(mode="manual"),
+    )
+    mock_session.set_node_status.assert_awaited_once_with(
+        "device_1", node_info, {"stemp": "21", "units": "C", "mode": "manual"}
+    )
+    assert statuses == [node.status] * 3
+    assert node.status == {"stemp": "21", "units": "C", "mode": "manual"}
+
+    # writes of consecutive windows do not overlap
+    in_flight = []
+
+    async def _set_node_status(dev_id, node_info, status_args):
+        in_flight.append(status_args)
+        assert len(in_flight) == 1
+        await asyncio.sleep(0.02)
+        in_flight.pop()
+
+    mock_session.set_node_status.reset_mock()
+    mock_session.set_node_status.side_effect = _set_node_status
+    first = asyncio.ensure_future(node.set_status(stemp="22"))
+    await asyncio.sleep(0.015)
+    await asyncio.gather(first, node.set_status(stemp="23"))
+    assert [call.args[2] for call in mock_session.set_node_status.await_args_list] == [
+        {"stemp": "22"},
+        {"stemp": "23"},
+    ]
+    assert node.status["stemp"] == "23"
+
+    # every merged caller gets the error
+    mock_session.set_node_status.side_effect = SmartboxError("write")
+    results = await asyncio.gather(
+        node.set_status(stemp="24"),
+        node.set_status(stemp="25"),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, SmartboxError) for result in results)
+    assert node.status["stemp"] == "23"
+
+
+async def test_smartbox_node_writes_limited_per_device(hass):
+    """The status writes of the nodes of a device go through its limiter."""
+    mock_device = MagicMock(
+        dev_id="device_1", hass=hass, write_limiter=asyncio.Semaphore(2)
+    )
+    mock_session = AsyncMock()
+    in_flight = []
+    max_in_flight = 0
+
+    async def _set_node_status(dev_id, node_info, status_args):
+        nonlocal max_in_flight
+        in_flight.append(node_info["addr"])
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(node_info["addr"])
+
+    mock_session.set_node_status.side_effect = _set_node_status
+    nodes = [
+        SmartboxNode(
+            mock_device,
+            {"addr": addr, "name": f"Heater {addr}", "type": SmartboxNodeType.HTR},
+            mock_session,
+            {},
+            {},
+            [],
+            {},
+        )
+        for addr in range(5)
+    ]
+    await asyncio.gather(*(node.set_status(mode="off") for node in nodes))
+    assert mock_session.set_node_status.await_count == 5
+    assert max_in_flight == 2
+
+
+async def test_smartbox_node_cancel_writes(hass):
+    """Pending and running status writes are cancelled along with their callers."""
+    node_info = {"addr": 3, "name": "Heater", "type": SmartboxNodeType.HTR}
+    mock_device = MagicMock(dev_id="device_1", hass=hass)
+    mock_session = AsyncMock()
+    node = SmartboxNode(mock_device, node_info, mock_session, {}, {}, [], {})
+
+    # a write waiting for its window to close
+    node.write_window = 60
+    pending = asyncio.ensure_future(node.set_status(stemp="20"))
+    await asyncio.sleep(0)
+    node.cancel_writes()
+    with pytest.raises(asyncio.CancelledError):
+        await pending
+    mock_session.set_node_status.assert_not_awaited()
+
+    # a write in flight
+    started = asyncio.Event()
+
+    async def _set_node_status(dev_id, node_info, status_args):
+        started.set()
+        await asyncio.Event().wait()
+
+    mock_session.set_node_status.side_effect = _set_node_status
+    node.write_window = 0
+    running = asyncio.ensure_future(node.set_status(stemp="21"))
+    await started.wait()
+    node.cancel_writes()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    await hass.async_block_till_done()
+    assert node.status == {}
+
+
+async def test_smartbox_node_suppresses_noop_writes(hass):
+    """Writes are diffed against the known state, and dropped when empty."""
+    node_info = {"addr": 3, "name": "Heater", "type": SmartboxNodeType.HTR}
+    mock_device = MagicMock(dev_id="device_1", suppressed_writes=0, hass=hass)
+    mock_session = AsyncMock()
+    node = SmartboxNode(
+        mock_device,
+        node_info,
+        mock_session,
+        {"stemp": "21", "units": "C", "mode": "manual"},
+        {
+            "window_mode_enabled": False,
+            "true_radiant_enabled": True,
+            "extra_options": {"boost_temp": "22", "boost_time": "60"},
+        },
+        [],
+        {},
+    )
+
+    await node.set_status(stemp="21", units="C", mode="manual")
+    await node.set_window_mode(False)
+    await node.set_true_radiant(True)
+    await node.set_extra_options({"boost_temp": "22"})
+    mock_session.set_node_status.assert_not_awaited()
+    mock_session.set_node_setup.assert_not_awaited()
+    assert mock_device.suppressed_writes == 4
+
+    await node.set_status(stemp="22", units="C", mode="manual")
+    mock_session.set_node_status.assert_awaited_once_with(
+        "device_1", node_info, {"stemp": "22", "units": "C", "mode": "manual"}
+    )
+    await node.set_extra_options({"boost_temp": "22", "boost_time": "90"})
+    mock_session.set_node_setup.assert_awaited_once_with(
+        "device_1", node_info, {"extra_options": {"boost_time": "90"}}
+    )
+    assert node.setup["extra_options"] == {"boost_temp": "22", "boost_time": "90"}
+    assert mock_device.suppressed_writes == 4
+
+
+async def test_smartbox_node_write_sends_unchanged_fields(hass):
+    """A changed htr_mod mode is still sent along with its selected_temp."""
+    node_info = {"addr": 3, "name": "Heater", "type": SmartboxNodeType.HTR_MOD}
+    mock_device = MagicMock(dev_id="device_1", suppressed_writes=0, hass=hass)
+    mock_session = AsyncMock()
+    status = {"on": True, "mode": "auto", "selected_temp": "comfort"}
+    node = SmartboxNode(mock_device, node_info, mock_session, status, {}, [], {})
+
+    await node.set_status(
+        **set_hvac_mode_args(SmartboxNodeType.HTR_MOD, node.status, HVACMode.HEAT)
+    )
+    mock_session.set_node_status.assert_awaited_once_with(
+        "device_1",
+        node_info,
+        {"selected_temp": "comfort", "on": True, "mode": "manual"},
+    )
+    assert node.status["mode"] == "manual"
+    assert mock_device.suppressed_writes == 0
+
+
+async def test_smartbox_device_suppresses_noop_writes(hass):
+    """Away status and power limit writes are dropped when unchanged."""
+    mock_session = AsyncMock()
+    with patch(
+        "custom_components.smartbox.models.SmartboxDevice.initialise_nodes",
+        new_callable=NonCallableMock,
+    ):
+        device = SmartboxDevice(
+            MOCK_SMARTBOX_DEVICE_INFO["device_1"], mock_session, hass
+        )
+    await device.set_away_status(False)
+    await device.set_power_limit(0)
+    mock_session.set_device_away_status.assert_not_awaited()
+    mock_session.set_device_power_limit.assert_not_awaited()
+    assert device.suppressed_writes == 2
+
+    await device.set_away_status(True)
+    await device.set_power_limit(1000)
+    mock_session.set_device_away_status.assert_awaited_once()
+    mock_session.set_device_power_limit.assert_awaited_once()
+    assert device.suppressed_writes == 2
+
+
 def test_get_target_temperature():
     assert get_target_temperature(SmartboxNodeType.HTR, {"stemp": "22.5"}) == 22.5
     assert get_target_temperature(SmartboxNodeType.ACM, {"stemp": "12.6"}) == 12.6
@@ -642,15 +1264,41 @@ def test_version_and_get_model_code():
     assert node.get_model_code() is None
 
 
-async def test_update_samples(hass):
+async def test_smartbox_node_create(hass):
     dev_id = "test_device_id_1"
     mock_device = AsyncMock()
     mock_device.dev_id = dev_id
-    mock_device.away = False
-    node_addr = 3
-    node_type = SmartboxNodeType.HTR
-    node_name = "Bathroom Heater"
-    node_info = {"addr": node_addr, "name": node_name, "type": node_type}
+    node_info = {"addr": 3, "name": "Bathroom Heater", "type": SmartboxNodeType.HTR}
+    mock_session = AsyncMock()
+    mock_session.get_node_status.return_value = {"mtemp": "21.4"}
+    mock_session.get_node_setup.return_value = {"window_mode_enabled": False}
+    mock_session.get_node_version.return_value = {"pid": "081c"}
+
+    node = await SmartboxNode.create(mock_device, mock_session, node_info)
+    assert node.status == {"mtemp": "21.4"}
+    assert node.setup == {"window_mode_enabled": False}
+    assert node.pid == "081c"
+    # samples are only loaded by the samples coordinator
+    mock_session.get_node_samples.assert_not_awaited()
+    assert node.total_energy is None
+
+    # every failing request is reported against the node address
+    mock_session.get_node_setup.side_effect = SmartboxError("setup")
+    mock_session.get_node_version.side_effect = SmartboxError("version")
+    with pytest.raises(SmartboxError, match="setup") as exc_info:
+        await SmartboxNode.create(mock_device, mock_session, node_info)
+    assert exc_info.value.__notes__ == [
+        (
+            f"Failed to create htr node 3 of device {dev_id}: "
+            "setup (SmartboxError('setup')), version (SmartboxError('version'))"
+        )
+    ]
+
+
+async def test_update_samples(hass):
+    device = SmartboxDevice(MOCK_SMARTBOX_DEVICE_INFO["device_1"], MagicMock(), hass)
+    coordinator = SamplesCoordinator(device, hass)
+    node_info = {"addr": 3, "name": "Bathroom Heater", "type": SmartboxNodeType.HTR}
     mock_session = AsyncMock()
     initial_status = {"mtemp": "21.4", "stemp": "22.5"}
     initial_setup = {
@@ -663,7 +1311,7 @@ async def test_update_samples(hass):
     ]
 
     node = SmartboxNode(
-        mock_device,
+        device,
         node_info,
         mock_session,
         initial_status,
@@ -672,33 +1320,33 @@ async def test_update_samples(hass):
         {},
     )
     assert node.total_energy == 247426
-    # Test case where get_samples returns less than 2 samples
-    mock_session.get_node_samples.return_value = {"samples": [{"counter": 100}]}
-    await node.update_samples()
+    # Test case where get_samples returns no sample
+    mock_session.get_node_samples.return_value = {"samples": []}
+    await coordinator.async_refresh_node(node)
     assert node._samples == node_sample
 
-    # Test case where get_samples returns 2 or more samples
-    mock_session.get_node_samples.return_value = {
-        "samples": [
-            {"counter": 100},
-            {"counter": 200},
-        ]
-    }
-    await node.update_samples()
-    assert node._samples == [{"counter": 100}, {"counter": 200}]
+    # Test case where get_samples returns a single new sample
+    new_sample = {"t": 1735687000, "counter": 247500}
+    mock_session.get_node_samples.return_value = {"samples": [new_sample]}
+    await coordinator.async_refresh_node(node)
+    assert node._samples == [node_sample[1], new_sample]
 
     # Test case where get_samples returns more than 2 samples
     mock_session.get_node_samples.return_value = {
         "samples": [
-            {"counter": 100},
-            {"counter": 200},
-            {"counter": 300},
+            {"t": 1735688000, "counter": 100},
+            {"t": 1735689000, "counter": 200},
+            {"t": 1735690000, "counter": 300},
         ]
     }
-    await node.update_samples()
-    assert node._samples == [{"counter": 200}, {"counter": 300}]
+    await coordinator.async_refresh_node(node)
+    assert node._samples == [
+        {"t": 1735689000, "counter": 200},
+        {"t": 1735690000, "counter": 300},
+    ]
+    assert node.total_energy == 300
     node = SmartboxNode(
-        mock_device,
+        device,
         node_info,
         mock_session,
         initial_status,
@@ -1,9 +1,24 @@
+import asyncio
+
 from homeassistant.components.number import ATTR_VALUE, DOMAIN as NUMBER_DOMAIN
 from homeassistant.components.number.const import SERVICE_SET_VALUE
-from homeassistant.const import ATTR_ENTITY_ID, ATTR_FRIENDLY_NAME
+from homeassistant.const import (
+    ATTR_AREA_ID,
+    ATTR_ENTITY_ID,
+    ATTR_FRIENDLY_NAME,
+    ATTR_TEMPERATURE,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import area_registry as ar, device_registry as dr
 from homeassistant.helpers.entity_component import async_update_entity
+import pytest
+from smartbox.error import SmartboxError
 
-from custom_components.smartbox.const import DOMAIN
+from custom_components.smartbox.const import (
+    ATTR_DURATION,
+    DOMAIN,
+    SERVICE_SET_BOOST_PARAMS,
+)
 
 from .mocks import (
     get_boost_duration_entity_id,
@@ -139,3 +154,77 @@ async def test_boost_duration(hass, mock_smartbox, config_entry):
     await async_update_entity(hass, entity_id)
     state = hass.states.get(entity_id)
     assert state.state == "120.0"
+
+
+async def test_set_boost_params(hass, mock_smartbox, config_entry):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    mock_device = (await mock_smartbox.session.get_devices())[1]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[3]
+    set_node_setup = mock_smartbox.session.set_node_setup
+    setup_updates = []
+
+    async def _set_node_setup(dev_id, node, updates):
+        setup_updates.append((f"{dev_id}_{node['addr']}", updates))
+        await set_node_setup(dev_id, node, updates)
+
+    mock_smartbox.session.set_node_setup = _set_node_setup
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_BOOST_PARAMS,
+        {
+            ATTR_TEMPERATURE: 22.5,
+            ATTR_DURATION: 120,
+            ATTR_ENTITY_ID: get_boost_temperature_entity_id(mock_node),
+        },
+        blocking=True,
+    )
+    node_id = f"{mock_device['dev_id']}_{mock_node['addr']}"
+    assert setup_updates == [
+        (node_id, {"extra_options": {"boost_temp": "22.5", "boost_time": 120}})
+    ]
+    await async_update_entity(hass, get_boost_duration_entity_id(mock_node))
+    assert hass.states.get(get_boost_duration_entity_id(mock_node)).state == "120.0"
+
+    # areas are resolved to the nodes of their devices
+    area = ar.async_get(hass).async_create("Bathroom")
+    device_registry = dr.async_get(hass)
+    device = device_registry.async_get_device(identifiers={(DOMAIN, node_id)})
+    device_registry.async_update_device(device.id, area_id=area.id)
+    setup_updates.clear()
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_BOOST_PARAMS,
+        {ATTR_DURATION: 180, ATTR_AREA_ID: area.id},
+        blocking=True,
+    )
+    assert setup_updates == [(node_id, {"extra_options": {"boost_time": 180}})]
+
+    # a failed write does not stop the others, and is reported once they finished
+    nodes = [node for node in config_entry.runtime_data.nodes if node.boost_available]
+    failing, other = nodes[:2]
+    setup_updates.clear()
+
+    async def _failing_set_node_setup(dev_id, node, updates):
+        if f"{dev_id}_{node['addr']}" == failing.node_id:
+            msg = "write"
+            raise SmartboxError(msg)
+        await asyncio.sleep(0.01)
+        await _set_node_setup(dev_id, node, updates)
+
+    mock_smartbox.session.set_node_setup = _failing_set_node_setup
+    with pytest.raises(HomeAssistantError, match=failing.name):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_SET_BOOST_PARAMS,
+            {
+                ATTR_DURATION: 240,
+                ATTR_ENTITY_ID: [
+                    get_boost_duration_entity_id(node.node_info)
+                    for node in (failing, other)
+                ],
+            },
+            blocking=True,
+        )
+    assert setup_updates == [(other.node_id, {"extra_options": {"boost_time": 240}})]
@@ -1,28 +1,39 @@
-from datetime import datetime
+import asyncio
+from datetime import UTC, datetime
 import logging
+import math
 import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from dateutil import tz
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
 from homeassistant.const import ATTR_FRIENDLY_NAME, ATTR_LOCKED, STATE_UNAVAILABLE
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity_component import async_update_entity
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
+from smartbox.error import SmartboxError
 
 from custom_components.smartbox.const import (
+    ATTR_POLL_INTERVAL,
+    BACKFILL_CHUNK,
+    BACKFILL_PERIOD,
     CONF_HISTORY_CONSUMPTION,
     DOMAIN,
     HistoryConsumptionStatus,
     SmartboxNodeType,
 )
+from custom_components.smartbox.models import SmartboxDevice, SmartboxNode
 from custom_components.smartbox.sensor import (
     BoostEndTimeSensor,
     ChargeLevelSensor,
     PowerSensor,
+    ShortTermStatistics,
     TotalConsumptionSensor,
+    samples_to_statistics,
 )
 
+from .const import MOCK_SMARTBOX_DEVICE_INFO
 from .mocks import (
     active_or_charging_update,
     get_entity_id_from_unique_id,
@@ -317,10 +328,36 @@ def test_charge_level_sensor_model_1c():
 
 
 @pytest.mark.asyncio
-async def test_update_statistics_start(hass, mock_smartbox, config_entry):
-    mock_node = AsyncMock()
-    mock_node.get_samples.return_value = [{"t": 1739966400, "counter": 100}]
-    sensor = TotalConsumptionSensor(mock_node, config_entry)
+async def test_update_statistics_start(hass, mock_smartbox, config_entry, freezer):
+    device = SmartboxDevice(
+        {**MOCK_SMARTBOX_DEVICE_INFO["device_1"], "home": {"id": "home_1"}},
+        mock_smartbox.session,
+        hass,
+    )
+    node = SmartboxNode(
+        device,
+        {"addr": 1, "name": "Heater", "type": SmartboxNodeType.HTR},
+        MagicMock(),
+        {},
+        {},
+        [],
+        {},
+    )
+    node.get_samples = AsyncMock(return_value=[{"t": 1739966400, "counter": 100}])
+    # the backfill of a node without an added consumption sensor never runs
+    disabled_node = SmartboxNode(
+        device,
+        {"addr": 2, "name": "Heater", "type": SmartboxNodeType.HTR},
+        MagicMock(),
+        {},
+        {},
+        [],
+        {},
+    )
+    disabled_node.start_backfill(BACKFILL_PERIOD)
+    config_entry.runtime_data = MagicMock(nodes=[node, disabled_node], devices=[device])
+    remove_node = device.samples_coordinator.add_node(node, AsyncMock())
+    sensor = TotalConsumptionSensor(node, config_entry)
     sensor.hass = hass
     hass.config_entries.async_update_entry(
         entry=config_entry,
@@ -329,6 +366,7 @@ async def test_update_statistics_start(hass, mock_smartbox, config_entry):
             CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.START,
         },
     )
+    chunks = math.ceil(BACKFILL_PERIOD / BACKFILL_CHUNK)
 
     with (
         patch.object(hass.config_entries, "async_update_entry") as mock_update_entry,
@@ -336,9 +374,40 @@ async def test_update_statistics_start(hass, mock_smartbox, config_entry):
             "custom_components.smartbox.sensor.async_import_statistics"
         ) as mock_import_statistics,
     ):
-        await sensor.update_statistics()
+        # the backfill started by the platform stops on the first failing chunk
+        # and keeps its checkpoint
+        node.start_backfill(BACKFILL_PERIOD)
+        node.get_samples.side_effect = [
+            [{"t": 1739966400, "counter": 100}],
+            [{"t": 1739966400, "counter": 100}],
+            SmartboxError,
+        ]
+        assert not await device.samples_coordinator.async_backfill_node(
+            node, sensor._async_import_statistics
+        )
+        assert node.get_samples.call_count == 3
+        assert mock_import_statistics.call_count == 2
+        assert node.backfill_pending
+        assert node.backfill_progress == pytest.approx(
+            2 * BACKFILL_CHUNK / BACKFILL_PERIOD
+        )
+        mock_update_entry.assert_not_called()
 
-        assert mock_node.get_samples.call_count == 3
+        # and resumes from it, switching to auto once finished
+        checkpoint = node.backfill["cursor"]
+        restored = SmartboxNode.from_snapshot(device, MagicMock(), node.as_snapshot())
+        restored.get_samples = AsyncMock(
+            return_value=[{"t": 1739966400, "counter": 100}]
+        )
+        config_entry.runtime_data.nodes = [restored, disabled_node]
+        remove_node()
+        remove_restored = device.samples_coordinator.add_node(restored, AsyncMock())
+        sensor._node = restored
+        await sensor._async_backfill()
+        assert restored.get_samples.call_count == chunks - 2
+        assert restored.get_samples.call_args_list[0].args[0] == checkpoint
+        assert not restored.backfill_pending
+        assert restored.backfill_progress == 1
         mock_update_entry.assert_called_once_with(
             entry=config_entry,
             options={
@@ -346,38 +415,157 @@ async def test_update_statistics_start(hass, mock_smartbox, config_entry):
                 CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
             },
         )
-        assert mock_import_statistics.called
+        assert disabled_node.backfill_pending
+
+        # a failing chunk is retried until it is imported
+        mock_update_entry.reset_mock()
+        restored.backfill = None
+        restored.start_backfill(BACKFILL_PERIOD)
+        restored.get_samples.reset_mock()
+        restored.get_samples.side_effect = [
+            SmartboxError,
+            *([[{"t": 1739966400, "counter": 100}]] * chunks),
+        ]
+        with patch("custom_components.smartbox.sensor.BACKFILL_RETRY_INTERVAL", 0):
+            await sensor._async_backfill()
+        assert restored.get_samples.call_count == chunks + 1
+        assert not restored.backfill_pending
+        mock_update_entry.assert_called_once()
+    remove_restored()
+
+
+def test_samples_to_statistics():
+    hour = 1739966400
+    statistics = samples_to_statistics(
+        [
+            {"t": hour, "counter": "100"},
+            {"t": hour + 900, "counter": "120"},
+            # the first sample of a duplicated time is kept
+            {"t": hour + 900, "counter": "130"},
+            # and out of order samples are sorted
+            {"t": hour - 3600, "counter": "90"},
+            {"t": hour + 3600, "counter": "200"},
+        ]
+    )
+    assert [(s["start"].timestamp(), s["sum"], s["state"]) for s in statistics] == [
+        (hour - 7200, 90.0, 90.0),
+        (hour - 3600, 100.0, 100.0),
+        (hour, 200.0, 200.0),
+    ]
+
+
+def test_samples_to_statistics_unsorted():
+    """Every hour of an unsorted batch is produced, in order."""
+    hour = 1739966400
+    samples = [{"t": hour + i * 900, "counter": i} for i in range(4 * 24)]
+    shuffled = samples[1::2] + samples[::2]
+    with patch("custom_components.smartbox.sensor.tz.tzlocal", return_value=UTC):
+        assert samples_to_statistics(shuffled) == samples_to_statistics(samples)
+        assert len(samples_to_statistics(shuffled)) == 24
+
+
+@pytest.mark.parametrize("time_zone", ["Europe/Madrid", "Asia/Kolkata", "UTC"])
+def test_samples_to_statistics_time_zones(time_zone):
+    """Statistics start on the local hour, across DST changes."""
+    local_tz = tz.gettz(time_zone)
+    end = 1739966400
+    samples = [
+        {"t": t, "counter": t // 900} for t in range(end - 3 * 365 * 86400, end, 900)
+    ]
+    with patch("custom_components.smartbox.sensor.tz.tzlocal", return_value=local_tz):
+        statistics = samples_to_statistics(samples)
+    expected = [
+        sample["t"] - 3600
+        for sample in samples
+        if datetime.fromtimestamp(sample["t"], local_tz).minute == 0
+    ]
+    assert [s["start"].timestamp() for s in statistics] == expected
+
+
+async def test_import_statistics_only_new(hass, mock_smartbox, config_entry):
+    sensor = TotalConsumptionSensor(AsyncMock(), config_entry)
+    sensor.hass = hass
+    sensor.entity_id = "sensor.total_consumption"
+    hour = 1739966400
+    samples = [{"t": hour + i * 3600, "counter": i} for i in range(4)]
+
+    def _imported_hours(mock_import_statistics):
+        return [
+            statistic["start"].timestamp()
+            for statistic in mock_import_statistics.call_args.args[2]
+        ]
+
+    with (
+        patch("custom_components.smartbox.sensor.get_instance") as mock_get_instance,
+        patch(
+            "custom_components.smartbox.sensor.async_import_statistics"
+        ) as mock_import_statistics,
+    ):
+        recorder_job = mock_get_instance.return_value.async_add_executor_job
+        recorder_job.side_effect = AsyncMock(
+            return_value={sensor.entity_id: [{"start": hour}]}
+        )
+        # the last imported hour is seeded from the recorder
+        await sensor._async_import_statistics(samples, only_new=True)
+        assert _imported_hours(mock_import_statistics) == [hour + 3600, hour + 7200]
+
+        # nothing new, nothing imported
+        mock_import_statistics.reset_mock()
+        await sensor._async_import_statistics(samples, only_new=True)
+        mock_import_statistics.assert_not_called()
+
+        # then only the new hours
+        samples.append({"t": hour + 4 * 3600, "counter": 4})
+        await sensor._async_import_statistics(samples, only_new=True)
+        assert _imported_hours(mock_import_statistics) == [hour + 3 * 3600]
+        recorder_job.assert_called_once()
 
+        # a backfill imports every hour
+        await sensor._async_import_statistics(samples)
+        assert len(_imported_hours(mock_import_statistics)) == len(samples)
 
-async def test_update_statistics_auto(hass, mock_smartbox, config_entry):
+
+@pytest.mark.parametrize(
+    "history_status", [HistoryConsumptionStatus.AUTO, HistoryConsumptionStatus.START]
+)
+async def test_update_statistics_auto(
+    hass, mock_smartbox, config_entry, history_status
+):
     assert await hass.config_entries.async_setup(config_entry.entry_id)
     await hass.async_block_till_done()
 
     mock_node = AsyncMock()
-    mock_node.get_samples.return_value = [{"t": 1739966400, "counter": 100}]
+    mock_node.backfill_pending = False
     sensor = TotalConsumptionSensor(mock_node, config_entry)
     sensor.hass = hass
+    sensor._last_imported_hour_seeded = True
     hass.config_entries.async_update_entry(
         entry=config_entry,
         options={
             **config_entry.options,
-            CONF_HISTORY_CONSUMPTION: HistoryConsumptionStatus.AUTO,
+            CONF_HISTORY_CONSUMPTION: history_status,
         },
     )
 
-    with patch(
-        "custom_components.smartbox.sensor.async_import_statistics"
-    ) as mock_import_statistics:
-        await sensor.update_statistics()
+    with (
+        patch(
+            "custom_components.smartbox.sensor.async_import_statistics"
+        ) as mock_import_statistics,
+        patch.object(sensor._short_term_statistics, "async_get_last"),
+        patch.object(sensor, "_adjust_short_term_statistics"),
+        patch.object(sensor, "async_write_ha_state"),
+    ):
+        # the samples fetched by the coordinator are imported, during the
+        # history backfill too
+        await sensor._async_samples_updated([{"t": 1739966400, "counter": 100}])
 
-        mock_node.get_samples.assert_called_once()
         assert mock_import_statistics.called
 
 
 @pytest.mark.asyncio
 async def test_update_statistics_off(hass, mock_smartbox, config_entry):
     mock_node = AsyncMock()
-    mock_node.get_samples = AsyncMock(return_value=[{"t": time.time(), "counter": 100}])
+    mock_node.backfill_pending = True
     sensor = TotalConsumptionSensor(mock_node, config_entry)
     sensor.hass = hass
     hass.config_entries.async_update_entry(
@@ -388,42 +576,55 @@ async def test_update_statistics_off(hass, mock_smartbox, config_entry):
         },
     )
 
-    with patch(
-        "custom_components.smartbox.sensor.async_import_statistics"
-    ) as mock_import_statistics:
-        await sensor.update_statistics()
+    with (
+        patch(
+            "custom_components.smartbox.sensor.async_import_statistics"
+        ) as mock_import_statistics,
+        patch.object(sensor._short_term_statistics, "async_get_last"),
+        patch.object(sensor, "_adjust_short_term_statistics"),
+        patch.object(sensor, "async_write_ha_state"),
+    ):
+        sensor._async_start_backfill()
+        await sensor._async_samples_updated([{"t": time.time(), "counter": 100}])
 
+        assert sensor._backfill_task is None
         mock_import_statistics.assert_not_called()
 
 
 @pytest.mark.asyncio
 async def test_async_update_pmo(hass, mock_smartbox, config_entry):
-    mock_node = AsyncMock()
+    mock_node = MagicMock()
     mock_node.node_type = SmartboxNodeType.PMO
-    mock_node.update_power = AsyncMock()
-    sensor = PowerSensor(mock_node, config_entry)
+    mock_node.status = {"power": 100, "locked": False}
+    power_poller = MagicMock(interval=120)
+    sensor = PowerSensor(mock_node, config_entry, power_poller)
     sensor.hass = hass
+    await sensor.async_added_to_hass()
+    power_poller.add_node.assert_called_once_with(
+        mock_node, sensor._async_power_updated
+    )
+    assert sensor.extra_state_attributes == {
+        ATTR_LOCKED: False,
+        ATTR_POLL_INTERVAL: 120,
+    }
 
     with patch.object(sensor, "async_write_ha_state") as mock_write_ha_state:
-        await sensor._async_update_pmo(None)
-
-        mock_node.update_power.assert_called_once()
+        sensor._async_power_updated()
         mock_write_ha_state.assert_called_once()
+        assert sensor.native_value == 100
 
 
 @pytest.mark.asyncio
 async def test_async_update_pmo_non_pmo_node(hass, mock_smartbox, config_entry):
-    mock_node = AsyncMock()
+    mock_node = MagicMock()
     mock_node.node_type = SmartboxNodeType.HTR
-    mock_node.update_power = AsyncMock()
-    sensor = PowerSensor(mock_node, config_entry)
+    mock_node.status = {"locked": False}
+    power_poller = MagicMock()
+    sensor = PowerSensor(mock_node, config_entry, power_poller)
     sensor.hass = hass
-
-    with patch.object(sensor, "async_write_ha_state") as mock_write_ha_state:
-        await sensor._async_update_pmo(None)
-
-        mock_node.update_power.assert_not_called()
-        mock_write_ha_state.assert_not_called()
+    await sensor.async_added_to_hass()
+    power_poller.add_node.assert_not_called()
+    assert sensor.extra_state_attributes == {ATTR_LOCKED: False}
 
 
 @pytest.mark.asyncio
@@ -446,10 +647,6 @@ async def test_adjust_short_term_statistics(hass, mock_smartbox, config_entry):
 
     with (
         patch("custom_components.smartbox.sensor.get_instance") as mock_get_instance,
-        patch(
-            "custom_components.smartbox.sensor.get_last_short_term_statistics",
-            return_value=last_stat,
-        ),
         patch.object(hass.loop, "run_in_executor", return_value=last_stat),
     ):
         mock_instance = mock_get_instance.return_value
@@ -485,10 +682,6 @@ async def test_adjust_short_term_statistics_no_adjustment(
 
     with (
         patch("custom_components.smartbox.sensor.get_instance") as mock_get_instance,
-        patch(
-            "custom_components.smartbox.sensor.get_last_short_term_statistics",
-            return_value=last_stat,
-        ),
         patch.object(hass.loop, "run_in_executor", return_value=last_stat),
     ):
         mock_instance = mock_get_instance.return_value
@@ -498,6 +691,59 @@ async def test_adjust_short_term_statistics_no_adjustment(
         mock_instance.async_adjust_statistics.assert_not_called()
 
 
+async def test_short_term_statistics_batched(hass, mock_smartbox, config_entry):
+    short_term_statistics = ShortTermStatistics()
+    sensors = []
+    for index in range(3):
+        sensor = TotalConsumptionSensor(
+            MagicMock(total_energy=100), config_entry, short_term_statistics
+        )
+        sensor.hass = hass
+        sensor.entity_id = f"sensor.test_{index}_total_consumption"
+        sensors.append(sensor)
+    last_stat = {
+        sensor.entity_id: [{"start": 1739966400, "sum": 50, "state": 100}]
+        for sensor in sensors
+    }
+
+    with patch("custom_components.smartbox.sensor.get_instance") as mock_get_instance:
+        mock_instance = mock_get_instance.return_value
+        mock_instance.async_add_executor_job = AsyncMock(return_value=last_stat)
+        # one query for the sensors of a cycle
+        await asyncio.gather(
+            *(sensor._adjust_short_term_statistics() for sensor in sensors)
+        )
+        mock_instance.async_add_executor_job.assert_awaited_once()
+        assert mock_instance.async_add_executor_job.await_args.args[2] == {
+            sensor.entity_id for sensor in sensors
+        }
+        assert mock_instance.async_adjust_statistics.call_count == 3
+
+        # then none while the sums stay aligned
+        mock_instance.reset_mock()
+        for sensor in sensors:
+            await sensor._adjust_short_term_statistics()
+        mock_instance.async_add_executor_job.assert_not_awaited()
+        mock_instance.async_adjust_statistics.assert_not_called()
+
+        # unless the counter went backwards
+        sensors[0]._node.total_energy = 10
+        await sensors[0]._adjust_short_term_statistics()
+        mock_instance.async_add_executor_job.assert_awaited_once()
+
+        # or new statistics were imported
+        mock_instance.reset_mock()
+        with patch("custom_components.smartbox.sensor.async_import_statistics"):
+            await sensors[1]._async_import_statistics(
+                [{"t": 1739966400, "counter": 100}]
+            )
+        await sensors[1]._adjust_short_term_statistics()
+        mock_instance.async_add_executor_job.assert_awaited_once()
+        assert mock_instance.async_add_executor_job.await_args.args[2] == {
+            sensors[1].entity_id
+        }
+
+
 @pytest.mark.asyncio
 async def test_native_value_boost_end_time_sensor(hass, mock_smartbox, config_entry):
     mock_node = AsyncMock()
@@ -520,3 +766,52 @@ async def test_native_value_boost_end_time_sensor(hass, mock_smartbox, config_en
         # Test no boost
         mock_node.boost = False
         assert sensor.native_value is None
+
+
+@pytest.mark.asyncio
+async def test_total_consumption_lazy_samples(
+    hass, mock_smartbox, config_entry, recorder_mock
+):
+    """Samples are only fetched for nodes with an enabled consumption sensor."""
+    mock_node = (await mock_smartbox.session.get_nodes("device_1"))[0]
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    unique_id = get_node_unique_id(mock_device, mock_node, "total_consumption")
+    er.async_get(hass).async_get_or_create(
+        SENSOR_DOMAIN,
+        DOMAIN,
+        unique_id,
+        config_entry=config_entry,
+        disabled_by=er.RegistryEntryDisabler.USER,
+    )
+    mock_smartbox.session.get_node_samples.reset_mock()
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    sampled = {
+        (call.args[0], call.args[1]["addr"])
+        for call in mock_smartbox.session.get_node_samples.await_args_list
+    }
+    assert (mock_device["dev_id"], mock_node["addr"]) not in sampled
+    assert ("device_2", 1) in sampled
+
+
+@pytest.mark.asyncio
+async def test_status_update_only_wakes_dependent_entities(
+    hass, mock_smartbox, config_entry, recorder_mock
+):
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    mock_device = (await mock_smartbox.session.get_devices())[0]
+    mock_node = (await mock_smartbox.session.get_nodes(mock_device["dev_id"]))[0]
+    assert mock_node["type"] == SmartboxNodeType.HTR
+    temperature_id = get_sensor_entity_id(mock_node, "temperature")
+    duty_cycle_id = get_sensor_entity_id(mock_node, "duty_cycle")
+    last_reported = hass.states.get(temperature_id).last_reported
+
+    mock_smartbox.generate_socket_status_update(mock_device, mock_node, {"duty": 75})
+    await hass.async_block_till_done()
+
+    assert hass.states.get(duty_cycle_id).state == "75"
+    assert hass.states.get(temperature_id).last_reported == last_reported